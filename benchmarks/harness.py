@@ -0,0 +1,295 @@
+"""Throughput and latency of a realistic relax app, per scenario.
+
+The app has path and query params, injected dependencies, nested components,
+htmx partials, full pages streamed into a layout, and JSON. By default it is
+driven in-process through ASGI, without sockets, so only relax and starlette
+are measured:
+
+    python benchmarks/harness.py
+    python benchmarks/harness.py --uvicorn            # against a local uvicorn
+    python benchmarks/harness.py --save-baseline      # store the results
+    python benchmarks/harness.py --compare            # compare with the stored ones
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from pydantic import BaseModel
+
+from relax.app import (
+    App,
+    HTMLResponse,
+    Layout,
+    PathStr,
+    QueryInt,
+    QueryStr,
+    Request,
+    Router,
+)
+from relax.config import BaseConfig
+from relax.html import Element, body, div, head, html, li, span, title, ul
+from relax.injection import Container, Injected, component
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    price: int
+
+
+class Catalog:
+    def __init__(self) -> None:
+        self.items = [
+            Item(id=idx, name=f"item {idx}", price=idx * 3) for idx in range(200)
+        ]
+
+    def page(self, category: str, page: int, sort: str) -> list[Item]:
+        items = sorted(self.items, key=lambda item: item.price, reverse=sort == "desc")
+        start = (page - 1) * 20 + len(category)
+        return items[start : start + 20]
+
+
+@component(key=lambda item: item.id)
+def item_row(item: Item) -> Element:
+    return li().insert(span(text=item.name), span(text=str(item.price)))
+
+
+@component(key=lambda category: category)
+def item_list(category: str, items: list[Item]) -> Element:
+    return div().insert(
+        span(text=category),
+        ul().insert(*(item_row(item=item) for item in items)),
+    )
+
+
+def page_root(child: Element) -> Element:
+    return html(lang="en").insert(head().insert(title("shop")), body().insert(child))
+
+
+layout = Layout(page_root)
+router = Router()
+
+
+@router.path_function("GET", "/items/{category}", layout=layout)
+async def items_page(
+    request: Request,  # noqa: ARG001
+    category: PathStr,
+    page: QueryInt = 1,
+    sort: QueryStr = "asc",
+    *,
+    catalog: Catalog = Injected,
+) -> HTMLResponse:
+    return HTMLResponse(
+        item_list(category=category, items=catalog.page(category, page, sort)),
+    )
+
+
+@router.path_function("GET", "/api/items/{category}")
+async def items_json(
+    request: Request,  # noqa: ARG001
+    category: PathStr,
+    page: QueryInt = 1,
+    *,
+    catalog: Catalog = Injected,
+) -> list[Item]:
+    return catalog.page(category, page, "asc")
+
+
+class Scenario(NamedTuple):
+    name: str
+    path: str
+    query_string: str
+    headers: list[tuple[str, str]]
+
+
+SCENARIOS = [
+    Scenario(
+        "htmx partial",
+        "/items/books",
+        "page=2&sort=desc",
+        [("hx-request", "true")],
+    ),
+    Scenario("full page", "/items/books", "page=2&sort=desc", []),
+    Scenario("json", "/api/items/books", "page=3", []),
+]
+
+
+class Result(NamedTuple):
+    requests_per_second: float
+    p50_ms: float
+    p99_ms: float
+
+
+def make_app() -> App:
+    container = Container()
+    container.add_injectable(Catalog, Catalog())
+    app = App(
+        config=BaseConfig(TEMPLATES_DIR=Path(), ENV="TEST"),
+        container=container,
+        route_tree=True,
+    )
+    app.add_router(router)
+    return app
+
+
+def in_process_requester(app: App, scenario: Scenario) -> Callable[[], Awaitable[None]]:
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": scenario.path,
+        "raw_path": scenario.path.encode(),
+        "root_path": "",
+        "query_string": scenario.query_string.encode(),
+        "headers": [(b"host", b"localhost")]
+        + [(name.encode(), value.encode()) for name, value in scenario.headers],
+        "server": ("localhost", 80),
+    }
+
+    async def send(message: dict[str, Any]) -> None:
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            msg = f"{scenario.name} answered {message['status']}"
+            raise RuntimeError(msg)
+
+    async def request() -> None:
+        received = False
+
+        async def receive() -> dict[str, Any]:
+            nonlocal received
+            if received:
+                # streaming responses listen for a disconnect until they're done
+                await asyncio.Event().wait()
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        await app(dict(scope), receive, send)
+
+    return request
+
+
+async def measure(
+    request: Callable[[], Awaitable[None]],
+    total: int,
+    concurrency: int,
+) -> Result:
+    for _ in range(total // 10):
+        await request()
+    latencies: list[float] = []
+    remaining = total
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            await request()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    percentiles = statistics.quantiles(latencies, n=100)
+    return Result(
+        requests_per_second=len(latencies) / elapsed,
+        p50_ms=percentiles[49] * 1000,
+        p99_ms=percentiles[98] * 1000,
+    )
+
+
+async def run_in_process(total: int, concurrency: int) -> dict[str, Result]:
+    app = make_app()
+    return {
+        scenario.name: await measure(
+            in_process_requester(app, scenario),
+            total,
+            concurrency,
+        )
+        for scenario in SCENARIOS
+    }
+
+
+async def run_against_uvicorn(total: int, concurrency: int) -> dict[str, Result]:
+    # only needed for this mode
+    import httpx
+    import uvicorn
+
+    server = uvicorn.Server(
+        uvicorn.Config(make_app(), host=HOST, port=PORT, log_level="warning"),
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        await asyncio.sleep(0.01)
+    results: dict[str, Result] = {}
+    try:
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(
+            base_url=f"http://{HOST}:{PORT}",
+            limits=limits,
+        ) as client:
+            for scenario in SCENARIOS:
+
+                async def request(scenario: Scenario = scenario) -> None:
+                    response = await client.get(
+                        f"{scenario.path}?{scenario.query_string}",
+                        headers=scenario.headers,
+                    )
+                    response.raise_for_status()
+
+                results[scenario.name] = await measure(request, total, concurrency)
+    finally:
+        server.should_exit = True
+        thread.join()
+    return results
+
+
+def report(mode: str, results: dict[str, Result], baselines: dict[str, Any]) -> None:
+    baseline = baselines.get(mode, {})
+    for name, result in results.items():
+        line = (
+            f"{name:>14}: {result.requests_per_second:9.0f} req/s  "
+            f"p50 {result.p50_ms:7.3f}ms  p99 {result.p99_ms:7.3f}ms"
+        )
+        if (previous := baseline.get(name)) is not None:
+            change = result.requests_per_second / previous["requests_per_second"] - 1
+            line += f"  ({change:+.1%} req/s vs baseline)"
+        print(line)  # noqa: T201
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uvicorn", action="store_true", help="use a local uvicorn")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--baselines", type=Path, default=BASELINES_PATH)
+    args = parser.parse_args()
+
+    mode = "uvicorn" if args.uvicorn else "in-process"
+    run = run_against_uvicorn if args.uvicorn else run_in_process
+    results = asyncio.run(run(args.requests, args.concurrency))
+
+    baselines: dict[str, Any] = {}
+    if args.baselines.exists():
+        baselines = json.loads(args.baselines.read_text())
+    report(mode, results, baselines if args.compare else {})
+    if args.save_baseline:
+        baselines[mode] = {name: result._asdict() for name, result in results.items()}
+        args.baselines.write_text(json.dumps(baselines, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Overhead of per-route metrics, per request.
+
+    python benchmarks/metrics.py
+"""
+import asyncio
+from pathlib import Path
+
+from routing import router, run
+
+from relax.app import App
+from relax.config import BaseConfig
+from relax.metrics import Metrics
+
+
+async def main() -> None:
+    config = BaseConfig(TEMPLATES_DIR=Path(), ENV="TEST")
+    for metrics in (None, Metrics()):
+        router.app = None
+        app = App(config=config, metrics=metrics)
+        app.add_router(router)
+        await run(f"metrics={metrics is not None}", app)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
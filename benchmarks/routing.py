@@ -0,0 +1,97 @@
+"""Routing overhead of path functions, per request.
+
+Drives the ASGI app in-process, so only relax and starlette are measured:
+
+    python benchmarks/routing.py
+"""
+import asyncio
+import time
+from pathlib import Path
+from typing import Any
+
+from relax.app import App, HTMLResponse, PathInt, QueryInt, QueryStr, Request, Router
+from relax.config import BaseConfig
+from relax.html import div
+
+ITERATIONS = 20_000
+FILLER_ROUTES = 300
+
+router = Router()
+filler_router = Router()
+
+
+async def filler(request: Request) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(div())
+
+
+for idx in range(FILLER_ROUTES):
+    filler.__name__ = f"filler_{idx}"
+    filler_router.path_function("GET", f"/filler/{idx}/{{item_id}}")(filler)
+
+
+@router.path_function("GET", "/users/{user_id}/posts")
+async def user_posts(
+    request: Request,  # noqa: ARG001
+    user_id: PathInt,
+    page: QueryInt = 1,
+    sort: QueryStr = "new",
+) -> HTMLResponse:
+    return HTMLResponse(div(text=f"{user_id} {page} {sort}"))
+
+
+def make_scope(path: str, query_string: bytes) -> dict[str, Any]:
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [(b"host", b"localhost"), (b"hx-request", b"true")],
+        "server": ("localhost", 80),
+    }
+
+
+async def receive() -> dict[str, Any]:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(_: dict[str, Any]) -> None:
+    pass
+
+
+async def run(label: str, app: App) -> None:
+    scope = make_scope("/users/42/posts", b"page=3&sort=top")
+
+    for _ in range(ITERATIONS // 10):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await app(dict(scope), receive, send)
+    elapsed = time.perf_counter() - start
+
+    per_request = elapsed / ITERATIONS * 1_000_000
+    print(f"{label}: {per_request:.1f}us per request")  # noqa: T201
+
+
+async def main() -> None:
+    config = BaseConfig(TEMPLATES_DIR=Path(), ENV="TEST")
+    for route_tree in (False, True):
+        # every app gets the same routers, which can only be added to one app
+        router.app = filler_router.app = None
+        app = App(config=config, route_tree=route_tree)
+        app.add_router(router)
+        await run(f"1 route, route_tree={route_tree}", app)
+
+        # the benchmarked route is registered last, the worst case for a scan
+        router.app = None
+        app = App(config=config, route_tree=route_tree)
+        app.add_router(filler_router)
+        app.add_router(router)
+        await run(f"{FILLER_ROUTES + 1} routes, route_tree={route_tree}", app)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,18 +1,25 @@
 import asyncio
+import collections.abc
 import contextlib
+import copy
 import importlib
-import inspect
-import json
 import logging
-import os
-from dataclasses import _MISSING_TYPE, Field, is_dataclass
+import sys
+from contextvars import ContextVar
+from dataclasses import Field
 from enum import StrEnum, auto
 from functools import wraps
-from html import escape
-from inspect import Parameter, signature
+from inspect import (
+    Parameter,
+    isasyncgenfunction,
+    isawaitable,
+    isclass,
+    signature,
+)
 from pathlib import Path
-from types import ModuleType
+from types import ModuleType, UnionType
 from typing import (
+    TYPE_CHECKING,
     Annotated,
     Any,
     AsyncGenerator,
@@ -23,34 +30,59 @@ from typing import (
     Generic,
     Literal,
     Mapping,
+    NamedTuple,
     Protocol,
+    Self,
     Sequence,
     TypedDict,
     TypeVar,
+    Union,
     get_args,
     get_origin,
+    get_type_hints,
 )
 
 import starlette.requests
 import starlette.responses
 import starlette.types
-from pydantic import BaseModel
+from starlette._utils import is_async_callable
 from starlette.applications import Starlette
-from starlette.authentication import requires
-from starlette.datastructures import URL, UploadFile, URLPath
+from starlette.authentication import AuthenticationBackend
+from starlette.datastructures import URL, URLPath
 from starlette.middleware import Middleware
 from starlette.routing import Route
-from starlette.websockets import WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocket
 from typing_extensions import ParamSpec
 
+import relax.forms
 import relax.html
-from relax.config import BaseConfig
+import relax.profiling
+import relax.timing
+from relax.auth import protected
+from relax.broadcast import Broadcaster
+from relax.cache import RouteCache, SingleFlight, cache_key
 from relax.injection import (
     _COMPONENT_NAMES,
-    COMPONENTS_CACHE_FILE,
+    Container,
     Injected,
-    injectable,
+    View,
+    current_container,
+    inject_into_kwargs,
 )
+from relax.metrics import Metrics
+from relax.profiling import Profiler
+from relax.routing import RouteTree, URLBuilder
+from relax.threads import ThreadPool
+from relax.timing import TimingHook, current_timings
+
+if TYPE_CHECKING:
+    # pydantic is slow to import and only needed by some apps, and the config
+    # module pulls it in through pydantic-settings
+    from pydantic import BaseModel, TypeAdapter
+
+    from relax.config import BaseConfig
+    from relax.hmr import ModuleGraph
+    from relax.static import StaticAssets
 
 QueryStr = Annotated[str, "query_param"]
 QueryInt = Annotated[int, "query_param"]
@@ -60,21 +92,33 @@ PathStr = Annotated[str, "path_param"]
 P = ParamSpec("P")
 T = TypeVar("T")
 
-CLIENTS: set[WebSocket] = set()
 IMPORTS: dict[str, ModuleType] = {}
+# endpoints of path functions by "module:name", for routes loaded from a
+# manifest, whose module is only imported on their first request
+PATH_FUNCTIONS: dict[str, Callable] = {}
+# the app and extractors (when they could be compiled ahead of time) of
+# manifest routes whose module hasn't been imported yet
+MANIFEST_ROUTES: dict[str, tuple["App", list["ParamExtractor"] | None]] = {}
+# routers of path functions by "module:name", so a manifest loaded after
+# their module was imported can still bind them to its app
+PATH_FUNCTION_ROUTERS: dict[str, "Router"] = {}
 
 
 class DataclassInstance(Protocol):
     __dataclass_fields__: ClassVar[dict[str, Field[Any]]]
 
 
-DataclassT = TypeVar("DataclassT", bound=[DataclassInstance, BaseModel])
+DataclassT = TypeVar("DataclassT", bound=[DataclassInstance, "BaseModel"])
 
 Method = Literal["GET", "POST", "PUT", "DELETE", "PATCH"]
 
 logger = logging.getLogger(__name__)
 
 
+# set while running handlers of routes that render their HTML in a thread
+_DEFER_RENDER: ContextVar[bool] = ContextVar("relax_defer_render", default=False)
+
+
 class HTMLResponse(starlette.responses.HTMLResponse):
     def __init__(
         self,
@@ -82,7 +126,191 @@ class HTMLResponse(starlette.responses.HTMLResponse):
         status_code: int = 200,
         headers: Mapping[str, str] | None = None,
     ) -> None:
-        super().__init__(content.render(), status_code, headers)
+        self.element: relax.html.Element | None = None
+        if _DEFER_RENDER.get():
+            # rendered later by `render_in`, the handler only builds the tree
+            self.element = content
+            super().__init__(b"", status_code, headers)
+        elif (timings := current_timings()) is None:
+            super().__init__(content.render(), status_code, headers)
+        else:
+            with timings.measure("render"):
+                super().__init__(content.render(), status_code, headers)
+
+    async def render_in(self, pool: ThreadPool) -> None:
+        if self.element is None:
+            return
+        with relax.timing.measure("render"):
+            self.body = self.render(await pool.run(self.element.render))
+        self.element = None
+        self.raw_headers = [
+            (key, value) for key, value in self.raw_headers if key != b"content-length"
+        ]
+        self.raw_headers.append((b"content-length", str(len(self.body)).encode()))
+
+
+class JSONResponse(starlette.responses.Response):
+    media_type = "application/json"
+
+
+async def _json_array(
+    items: collections.abc.AsyncIterable[Any],
+    adapter: "TypeAdapter",
+) -> AsyncGenerator[bytes, None]:
+    yield b"["
+    first = True
+    async for item in items:
+        if not first:
+            yield b","
+        first = False
+        yield adapter.dump_json(item)
+    yield b"]"
+
+
+STREAMED_ANNOTATIONS = (
+    collections.abc.AsyncIterator,
+    collections.abc.AsyncIterable,
+    collections.abc.AsyncGenerator,
+)
+
+
+def compile_json_encoder(
+    func: Callable,
+) -> Callable[[Any], starlette.responses.Response] | None:
+    try:
+        return_annotation = get_type_hints(func).get("return")
+    except NameError:
+        # annotations that can't be resolved at runtime can't be serialized
+        return None
+    if return_annotation is None or _is_response_type(return_annotation):
+        return None
+
+    # pydantic is only imported once a handler actually returns data
+    from pydantic import PydanticSchemaGenerationError, TypeAdapter
+
+    try:
+        if get_origin(return_annotation) in STREAMED_ANNOTATIONS:
+            item_adapter = TypeAdapter(get_args(return_annotation)[0])
+            return lambda items: starlette.responses.StreamingResponse(
+                _json_array(items, item_adapter),
+                media_type=JSONResponse.media_type,
+            )
+        adapter = TypeAdapter(return_annotation)
+    except PydanticSchemaGenerationError:
+        # results of types pydantic doesn't know are returned as they are
+        return None
+    return lambda result: JSONResponse(adapter.dump_json(result))
+
+
+def _is_response_type(annotation: Any) -> bool:
+    # like `HTMLResponse | RedirectResponse` or `HTMLResponse | None`
+    if get_origin(annotation) in (Union, UnionType):
+        return any(_is_response_type(arg) for arg in get_args(annotation))
+    return isclass(annotation) and issubclass(
+        annotation,
+        starlette.responses.Response,
+    )
+
+
+class _LayoutSlot(relax.html.Tag):
+    name = "relax-layout-slot"
+    marker = "<!--relax-layout-slot-->"
+
+    def render(self) -> str:
+        return self.marker
+
+
+class LayoutError(Exception): ...
+
+
+# headers of handler responses that the layout response makes up for
+_LAYOUT_HEADERS = frozenset((b"content-type", b"content-length"))
+
+
+class Layout:
+    """A page shell, rendered once, that full page responses are streamed into.
+
+    The part of the shell before the slot is sent as soon as the request
+    arrives, so the browser can fetch scripts and styles while the handler is
+    still running. Since that happens before the handler runs, the status and
+    headers are already sent when the handler returns: handlers of routes
+    using a layout must return a 200 HTML response without headers of their
+    own, so no redirects or cookies. Other responses raise `LayoutError`, and
+    like handler errors, abort the response after the shell's prefix.
+    """
+
+    # by the qualified name of their shell function
+    instances: ClassVar[dict[str, "Layout"]] = {}
+
+    def __new__(
+        cls,
+        shell: Callable[[relax.html.Element], relax.html.Element],
+    ) -> Self:
+        # a reloaded layout module gets the instance its routes already use
+        key = f"{shell.__module__}.{shell.__qualname__}"
+        layout = cls.instances.get(key)
+        if not isinstance(layout, cls):
+            layout = cls.instances[key] = super().__new__(cls)
+        return layout
+
+    def __init__(
+        self,
+        shell: Callable[[relax.html.Element], relax.html.Element],
+    ) -> None:
+        self.shell = shell
+        self._parts: tuple[bytes, bytes] | None = None
+
+    @property
+    def parts(self) -> tuple[bytes, bytes]:
+        if self._parts is None:
+            rendered = self.shell(_LayoutSlot()).render()
+            prefix, suffix = rendered.split(_LayoutSlot.marker)
+            self._parts = prefix.encode(), suffix.encode()
+        return self._parts
+
+    def invalidate(self) -> None:
+        self._parts = None
+
+    async def _stream(
+        self,
+        content: Awaitable[starlette.responses.Response],
+    ) -> AsyncGenerator[bytes, None]:
+        prefix, suffix = self.parts
+        yield prefix
+        response = await content
+        _check_layout_response(response)
+        if hasattr(response, "body"):
+            yield response.body
+        else:
+            async for chunk in response.body_iterator:  # type: ignore
+                yield chunk if isinstance(chunk, bytes) else chunk.encode()
+        yield suffix
+
+    def stream(
+        self,
+        content: Awaitable[starlette.responses.Response],
+    ) -> starlette.responses.StreamingResponse:
+        return starlette.responses.StreamingResponse(
+            self._stream(content),
+            media_type="text/html",
+        )
+
+
+def _check_layout_response(response: starlette.responses.Response) -> None:
+    headers = dict(response.raw_headers)
+    extra = sorted(key.decode() for key in headers.keys() - _LAYOUT_HEADERS)
+    if (
+        response.status_code != 200  # noqa: PLR2004
+        or not headers.get(b"content-type", b"").startswith(b"text/html")
+        or extra
+    ):
+        content_type = headers.get(b"content-type", b"").decode()
+        msg = (
+            f"can't stream a {response.status_code} response of type "
+            f"{content_type!r} with headers {extra} into a layout, whose 200 "
+            "status and headers were already sent"
+        )
+        raise LayoutError(msg)
 
 
 class AuthScope(StrEnum):
@@ -106,42 +334,45 @@ class Request(starlette.requests.Request, Generic[T]):
         *_: P.args,
         **kwargs: P.kwargs,
     ) -> URL:
-        return self.url_for(func.__name__, **kwargs)
+        return self._build_url(func.__name__, kwargs)
 
     def url_wrapper(
         self,
         func: Callable[Concatenate["Request", P], Awaitable[Any]],
     ) -> Callable[P, URL]:
         def inner(*_: P.args, **kwargs: P.kwargs) -> URL:
-            return self.url_for(func.__name__, **kwargs)
+            return self._build_url(func.__name__, kwargs)
 
         return inner
 
+    def _build_url(self, name: str, params: dict[str, Any]) -> URL:
+        url_builders: dict[str, URLBuilder] = getattr(self.app, "url_builders", {})
+        if (builder := url_builders.get(name)) is None:
+            return self.url_for(name, **params)
+        return builder(**params).make_absolute_url(self.base_url)
+
     @contextlib.asynccontextmanager
     async def parse_form(
         self,
         data_shape: type[DataclassT],
+        *,
+        max_upload_size: int | None = None,
+        spool_max_size: int = relax.forms.SPOOL_MAX_SIZE,
+        max_files: float = 1000,
+        max_fields: float = 1000,
     ) -> AsyncGenerator[DataclassT, None]:
-        fields: dict[str, Any] = {}
-        async with self.form() as form:
-            if issubclass(data_shape, BaseModel):
-                yield data_shape.model_validate(form)
-            elif is_dataclass(data_shape):
-                for name, field in data_shape.__dataclass_fields__.items():
-                    try:
-                        if field.type is UploadFile:
-                            fields[name] = form[name]
-                        else:
-                            fields[name] = field.type(form[name])
-                    except KeyError:
-                        if isinstance(field.default, _MISSING_TYPE):
-                            raise
-                        fields[name] = field.default
-                yield data_shape(**fields)
-            else:
-                raise TypeError(
-                    "data_shape for form must be a pydantic model or a dataclass",
-                )
+        decoder = relax.forms.form_decoder(data_shape)
+        form = await relax.forms.read_form(
+            self,
+            max_files=max_files,
+            max_fields=max_fields,
+            max_upload_size=max_upload_size,
+            spool_max_size=spool_max_size,
+        )
+        try:
+            yield decoder(form)
+        finally:
+            await form.close()
 
 
 class UserType(Protocol):
@@ -170,76 +401,280 @@ def get_annotated(param: Parameter) -> Any:
     return None
 
 
-def load_views() -> dict | None:
+class ParamExtractor(NamedTuple):
+    name: str
+    source: Literal["query_param", "path_param"]
+    converter: Callable[[str], Any]
+    default: Any
+
+
+def compile_extractors(func: Callable) -> list[ParamExtractor]:
+    extractors: list[ParamExtractor] = []
+    for param_name, param in signature(func).parameters.items():
+        args = get_annotated(param)
+        if args and args[1] in ("query_param", "path_param"):
+            # TODO: also allow something like
+            # \ Annotated[Path | None, "query_param"] = Path("/")
+            extractors.append(
+                ParamExtractor(param_name, args[1], args[0], param.default),
+            )
+    return extractors
+
+
+def extract_params(
+    request: starlette.requests.Request,
+    extractors: list[ParamExtractor],
+    func_name: str,
+) -> dict[str, Any]:
+    params: dict[str, Any] = {}
+    query_params = request.query_params
+    path_params = request.path_params
+    for name, source, converter, default in extractors:
+        values = query_params if source == "query_param" else path_params
+        if (param_value := values.get(name)) is None:
+            if default is Parameter.empty:
+                msg = (
+                    f"parameter {name} from function "
+                    f"{func_name} has no default value "
+                    "and was not provided in the request"
+                )
+                raise TypeError(msg)
+            params[name] = default
+        else:
+            params[name] = converter(param_value)
+    return params
+
+
+def _render_view(view: View) -> str:
+    from pydantic import BaseModel
+
+    fn_values = dict(view["data"])
+    fn_module, fn_name = view["path"].rsplit(".", 1)
+    if fn_module not in IMPORTS:
+        IMPORTS[fn_module] = importlib.import_module(fn_module)
+    fn = getattr(IMPORTS[fn_module], fn_name)
+
+    # TODO: if we can't find the function referenced in the data, drop it
+    for name, param in signature(fn).parameters.items():
+        try:
+            if (
+                param.default is not Injected
+                and isinstance(fn_values.get(name), dict)
+                and issubclass(param.annotation, BaseModel)
+            ):
+                model_obj = fn_values[name]
+                fn_values[name] = param.annotation(**(model_obj))
+        except TypeError:
+            pass
+
+    return fn(**fn_values).render()
+
+
+def _views_of(
+    container: Container,
+    modules: set[str] | None,
+    ids: set[str] | None = None,
+) -> dict[str, View]:
+    return {
+        id: view
+        for id, view in container.views.items()
+        if (modules is None or view["path"].rsplit(".", 1)[0] in modules)
+        and (ids is None or id in ids)
+    }
+
+
+def load_views(
+    container: Container | None = None,
+    modules: set[str] | None = None,
+) -> dict | None:
+    if container is None:
+        container = current_container()
     try:
-        raw_data = json.load(COMPONENTS_CACHE_FILE)
-        COMPONENTS_CACHE_FILE.seek(0)
-    except TypeError:
-        logger.exception("failed parsing JSON data")
-        raise
+        return {
+            id: _render_view(view)
+            for id, view in _views_of(container, modules).items()
+        }
+    except Exception as e:  # noqa: BLE001
+        logger.warning("failed loading views: %s", repr(e))
+        return None
 
-    updated_views = {}
 
-    logger.warning("loaded data")
+async def render_views(
+    thread_pool: ThreadPool,
+    modules: set[str] | None = None,
+    ids: set[str] | None = None,
+) -> dict | None:
+    """Re-renders the views of components from the given modules, in parallel.
+
+    Only views with the given ids are rendered, when given.
+    """
+    views = _views_of(current_container(), modules, ids)
     try:
-        for id, element in raw_data.items():
-            fn_path = element["path"]
-            fn_values = element["data"]
-            fn_module, fn_name = fn_path.rsplit(".", 1)
-            if fn_module not in IMPORTS:
-                IMPORTS[fn_module] = importlib.import_module(fn_module)
-            fn = getattr(IMPORTS[fn_module], fn_name)
-
-            # TODO: if we can't find the function referenced in the data, drop it
-            for name, param in signature(fn).parameters.items():
-                try:
-                    if (
-                        param.default is not Injected
-                        and isinstance(fn_values.get(name), dict)
-                        and issubclass(param.annotation, BaseModel)
-                    ):
-                        model_obj = fn_values[name]
-                        fn_values[name] = param.annotation(**(model_obj))
-                except TypeError:
-                    pass
-
-            updated_views[id] = fn(**fn_values).render()
+        rendered = await asyncio.gather(
+            *(thread_pool.run(_render_view, view) for view in views.values()),
+        )
     except Exception as e:  # noqa: BLE001
         logger.warning("failed loading views: %s", repr(e))
         return None
-    return updated_views
+    return dict(zip(views, rendered, strict=True))
 
 
 async def websocket_endpoint(websocket: WebSocket) -> None:
-    await websocket.accept()
-    logger.warning("got new websocket connection")
-    CLIENTS.add(websocket)
-    try:
-        while True:
-            data = await websocket.receive_text()
-            logger.warning("got new data: %s", data)
-    except WebSocketDisconnect:
-        CLIENTS.remove(websocket)
+    await websocket.app.broadcaster.serve(websocket)
 
 
 class App(Starlette):
     def __init__(
         self,
-        config: BaseConfig,
+        config: "BaseConfig",
         debug: bool = False,
         middleware: Sequence[Middleware] | None = None,
         lifespan: starlette.types.Lifespan["App"] | None = None,
+        *,
+        container: Container | None = None,
+        route_tree: bool = False,
+        thread_pool: ThreadPool | None = None,
+        render_threshold: int | None = None,
+        auth_backend: AuthenticationBackend | None = None,
+        metrics: Metrics | None = None,
+        timing_hooks: Sequence[TimingHook] = (),
+        server_timing: bool | None = None,
+        profiler: Profiler | None = None,
+        broadcaster: Broadcaster | None = None,
+        static: "StaticAssets | None" = None,
     ) -> None:
         super().__init__(debug=debug, middleware=middleware, lifespan=lifespan)
         self.config = config
+        # without a container of their own, apps start from what was added to
+        # the current one so far, but don't share what's added or built later
+        if container is None:
+            container = current_container().copy()
+        self.container = container
+        self.router.lifespan_context = self._check_providers_on_startup(
+            self.router.lifespan_context,
+        )
+        # routes from routers are matched through a single radix tree, instead
+        # of trying every route's regex in turn
+        self.route_tree: RouteTree | None = None
+        if route_tree:
+            self.route_tree = RouteTree()
+            self.routes.append(self.route_tree)
+        self.url_builders: dict[str, URLBuilder] = {}
+        self.routers: list[Router] = []
+        # runs sync path functions, and renders HTML off the event loop
+        self.thread_pool = thread_pool if thread_pool is not None else ThreadPool()
+        # routes whose last HTML response was at least this many bytes render
+        # the next one in the thread pool
+        self.render_threshold = render_threshold
+        # authenticates requests to routes with auth scopes, when not done by
+        # an AuthenticationMiddleware already
+        self.auth_backend = auth_backend
+        # hooks get the time spent in each phase of requests, which browsers
+        # show from the Server-Timing header, sent by default in dev
+        self.timing_hooks = list(timing_hooks)
+        self.server_timing = (
+            config.ENV == "DEV" if server_timing is None else server_timing
+        )
+        # pushes updates to the browsers connected to `websocket_endpoint`
+        self.broadcaster = broadcaster if broadcaster is not None else Broadcaster()
+        if profiler is not None:
+            self.routes.append(
+                Route(
+                    profiler.path,
+                    protected(profiler.endpoint, profiler.scopes),
+                    methods=["GET"],
+                    name="profiler",
+                ),
+            )
+        if static is not None:
+            self.routes.append(
+                Route(
+                    f"{static.path}/{{name:path}}",
+                    static.endpoint,
+                    methods=["GET", "HEAD"],
+                    name="static",
+                ),
+            )
+        # routes are only instrumented when metrics are enabled
+        self.metrics = metrics
+        if metrics is not None:
+            self.routes.append(
+                Route(metrics.path, metrics.endpoint, methods=["GET"], name="metrics"),
+            )
+
+    def _check_providers_on_startup(
+        self,
+        lifespan: starlette.types.Lifespan,
+    ) -> starlette.types.Lifespan:
+        @contextlib.asynccontextmanager
+        async def inner(app: Any) -> AsyncGenerator[Any, None]:
+            async with lifespan(app) as state:
+                # a broken provider graph fails the startup, not the first
+                # request injecting from it; providers can still be added by
+                # the app's own lifespan
+                self.container.check_providers()
+                yield state
+
+        return inner
+
+    async def __call__(
+        self,
+        scope: starlette.types.Scope,
+        receive: starlette.types.Receive,
+        send: starlette.types.Send,
+    ) -> None:
+        with self.container:
+            await super().__call__(scope, receive, send)
 
     def add_router(self, router: "Router") -> None:
+        if router.app is not None and router.app is not self:
+            msg = f"Router already added to {router.app}"
+            raise ValueError(msg)
         router.app = self
+        self.routers.append(router)
         for route in router.routes:
-            self.routes.append(route)
+            self.add_path_route(route, router.extractors[route.name])
+
+    def add_path_route(self, route: Route, extractors: list[ParamExtractor]) -> None:
+        query_params = {
+            extractor.name: extractor.default
+            for extractor in extractors
+            if extractor.source == "query_param"
+        }
+        # TODO: error out when finding a duplicate name
+        self.url_builders.setdefault(
+            route.name,
+            URLBuilder(route, query_params),
+        )
+        instrumented = self._instrument(route)
+        if self.route_tree is not None:
+            self.route_tree.add(instrumented)
+        else:
+            self.routes.append(instrumented)
+
+    def _instrument(self, route: Route) -> Route:
+        timed = bool(self.timing_hooks) or self.server_timing
+        if not timed and self.metrics is None:
+            return route
+        # routers can be added to several apps, so their routes are left as is
+        route = copy.copy(route)
+        if timed:
+            route.app = relax.timing.instrument(
+                route.name,
+                route.app,
+                self.timing_hooks,
+                server_timing=self.server_timing,
+            )
+        if self.metrics is not None:
+            route.app = self.metrics.instrument(route.name, route.app)
+        return route
 
     def listen_to_template_changes(self) -> None:
+        from relax.hmr import ModuleGraph
+
         print("Listening to template changes for hot-module replacement")
+        self.container.record_views = True
+        self.module_graph = ModuleGraph(self.config.TEMPLATES_DIR)
         self.listen_task = asyncio.create_task(self._listen_to_template_changes())
 
     async def _listen_to_template_changes(self) -> None:
@@ -247,11 +682,134 @@ class App(Starlette):
             self.config.RELOAD_SOCKET_PATH.unlink()
         print("gonna listen on socket")
         self.reload_server = await asyncio.start_unix_server(
-            intermediary_hot_replace_templates,
+            self._on_reload_connection,
             self.config.RELOAD_SOCKET_PATH,
         )
         print("started listening on socket: ", self.reload_server.is_serving())
 
+    async def _on_reload_connection(
+        self,
+        sr: asyncio.StreamReader,
+        sw: asyncio.StreamWriter,
+    ) -> None:
+        with self.container:
+            await intermediary_hot_replace_templates(
+                sr,
+                sw,
+                graph=self.module_graph,
+                thread_pool=self.thread_pool,
+                broadcaster=self.broadcaster,
+            )
+
+
+class RouteHandler:
+    """Handles the requests of a path function.
+
+    Params are extracted and injected, and the function called, in the app's
+    thread pool when it's sync. HTML responses are rendered, in the thread
+    pool too when they're big, and other results serialized to JSON. GET
+    responses go through the route's cache and coalescing, and full page
+    responses are streamed into its layout.
+    """
+
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        extractors: list[ParamExtractor],
+        *,
+        cache: RouteCache | None = None,
+        layout: Layout | None = None,
+        coalesce: bool = False,
+        render_in_thread: bool = False,
+    ) -> None:
+        self.func = func
+        self.extractors = extractors
+        self.cache = cache
+        if cache is not None:
+            cache.namespace = func.__name__
+        self.layout = layout
+        self.single_flight = SingleFlight() if coalesce else None
+        self.render_in_thread = render_in_thread
+        # handlers that don't return a response have their result serialized
+        # to JSON based on their return annotation
+        self.json_encoder = compile_json_encoder(func)
+        self.is_stream = isasyncgenfunction(func)
+        # sync handlers run in the app's thread pool, so they can block; async
+        # ones can be behind a partial or be callable objects
+        self.is_sync = not self.is_stream and not is_async_callable(func)
+        self.last_render_size = 0
+
+    async def __call__(
+        self,
+        request: starlette.requests.Request,
+    ) -> starlette.responses.Response:
+        request = Request(request)
+        request.scope["from_htmx"] = request.headers.get("HX-Request", False) == "true"
+        if self.layout is not None and not request.scope["from_htmx"]:
+            return self.layout.stream(self.respond(request))
+        return await self.respond(request)
+
+    async def respond(self, request: Request) -> starlette.responses.Response:
+        if request.method not in ("GET", "HEAD"):
+            return await self.handle(request)
+        if self.cache is not None:
+            return await self.cache.respond(request, self.coalesced)  # type: ignore
+        return await self.coalesced(request)
+
+    async def coalesced(self, request: Request) -> starlette.responses.Response:
+        if self.single_flight is None:
+            return await self.handle(request)
+        return await self.single_flight.do(
+            cache_key(request),
+            request,
+            self.handle,  # type: ignore
+        )
+
+    async def handle(self, request: Request) -> starlette.responses.Response:
+        # params are injected here, on the event loop, even for sync handlers
+        func = self.func
+        if (timings := current_timings()) is None:
+            params = extract_params(request, self.extractors, func.__name__)
+            inject_into_kwargs(func, params)
+            result = await self.call(request, params)
+        else:
+            with timings.measure("extract"):
+                params = extract_params(request, self.extractors, func.__name__)
+            with timings.measure("inject"):
+                inject_into_kwargs(func, params)
+            with timings.measure("handler"):
+                result = await self.call(request, params)
+        if isinstance(result, HTMLResponse):
+            await result.render_in(request.app.thread_pool)
+            self.last_render_size = len(result.body)
+        if self.json_encoder is None or isinstance(
+            result,
+            starlette.responses.Response,
+        ):
+            return result
+        return self.json_encoder(result)
+
+    async def call(self, request: Request, params: dict[str, Any]) -> Any:
+        if self.is_stream:
+            return self.func(request, **params)
+        if self.is_sync:
+            result = await request.app.thread_pool.run(self.func, request, **params)
+            # async handlers behind a sync decorator return their coroutine
+            if isawaitable(result):
+                return await result
+            return result
+        token = _DEFER_RENDER.set(self.defer_render(request))
+        try:
+            return await self.func(request, **params)
+        finally:
+            _DEFER_RENDER.reset(token)
+
+    def defer_render(self, request: Request) -> bool:
+        if self.render_in_thread:
+            return True
+        threshold = getattr(request.app, "render_threshold", None)
+        return threshold is not None and self.last_render_size >= threshold
+
 
 class BaseRouter(Protocol):
     ...
@@ -260,65 +818,87 @@ class BaseRouter(Protocol):
 class Router(BaseRouter):
     def __init__(self) -> None:
         self.routes: list[Route] = []
+        self.extractors: dict[str, list[ParamExtractor]] = {}
+        self.functions: dict[str, Callable] = {}
         self.app: App | None = None
 
+    def _extractors_of(
+        self,
+        path_function_id: str,
+        func: Callable,
+    ) -> list[ParamExtractor]:
+        extractors = None
+        if path_function_id in MANIFEST_ROUTES:
+            # the app already has this route, from its manifest
+            manifest_app, extractors = MANIFEST_ROUTES.pop(path_function_id)
+            if self.app is None:
+                self.app = manifest_app
+        if extractors is None:
+            extractors = compile_extractors(func)
+        return extractors
+
     def path_function(  # noqa: ANN201
         self,
         method: Method,
         endpoint: str,
         auth_scopes: list[AuthScope] | None = None,
+        *,
+        cache: RouteCache | None = None,
+        layout: Layout | None = None,
+        coalesce: bool = False,
+        render_in_thread: bool = False,
     ):
         if auth_scopes is None:
             auth_scopes = []
+        # cached and coalesced responses are served to everyone asking for the
+        # same URL, whoever they are
+        if cache is not None and auth_scopes:
+            msg = f"routes with auth scopes can't be cached: {endpoint}"
+            raise ValueError(msg)
+        if coalesce and auth_scopes:
+            msg = f"routes with auth scopes can't be coalesced: {endpoint}"
+            raise ValueError(msg)
 
         def decorator(
-            func: Callable[Concatenate["Request", P], Awaitable[Any]],
+            func: Callable[Concatenate["Request", P], Any],
         ) -> Callable[P, URLPath]:
-            @wraps(func)
-            @requires(auth_scopes)
-            async def inner(request: starlette.requests.Request):  # noqa: ANN202
-                request = Request(request)
-                params: dict[str, Any] = {}
-                request.scope["from_htmx"] = (
-                    request.headers.get("HX-Request", False) == "true"
-                )
-                for param_name, param in signature(func).parameters.items():
-                    args = get_annotated(param)
-                    if args and args[1] == "query_param":
-                        if (
-                            param_value := request.query_params.get(param_name)
-                        ) is None:
-                            if param.default is inspect._empty:
-                                msg = (
-                                    f"parameter {param_name} from function "
-                                    f"{func.__name__} has no default value "
-                                    "and was not provided in the request"
-                                )
-                                raise TypeError(msg)
-                            params[param_name] = param.default
-                        else:
-                            # TODO: also allow something like
-                            # \ Annotated[Path | None, "query_param"] = Path("/")
-                            params[param_name] = args[0](param_value)
-                    elif args and args[1] == "path_param":
-                        if (param_value := request.path_params.get(param_name)) is None:
-                            if param.default is inspect._empty:
-                                msg = (
-                                    f"parameter {param_name} from function "
-                                    f"{func.__name__} has no default value "
-                                    "and was not provided in the request"
-                                )
-                                raise TypeError(msg)
-                            params[param_name] = param.default
-                        else:
-                            params[param_name] = args[0](param_value)
-                return await injectable(func)(request, **params)
+            path_function_id = f"{func.__module__}:{func.__name__}"
+            extractors = self._extractors_of(path_function_id, func)
+            relax.profiling.label(func, f"route:{func.__name__}")
+            handler = RouteHandler(
+                func,
+                extractors,
+                cache=cache,
+                layout=layout,
+                coalesce=coalesce,
+                render_in_thread=render_in_thread,
+            )
+
+            async def inner(
+                request: starlette.requests.Request,
+            ) -> starlette.responses.Response:
+                return await handler(request)
+
+            # public routes don't pay for checking auth at all
+            route_endpoint: Callable[
+                [starlette.requests.Request],
+                Awaitable[starlette.responses.Response],
+            ] = protected(inner, auth_scopes) if auth_scopes else inner
 
             # TODO: maybe make the name file + fn_name?
             # TODO: also, error out when finding a duplicate name
             self.routes.append(
-                Route(endpoint, inner, methods=[method], name=func.__name__),
+                Route(
+                    endpoint,
+                    wraps(func)(route_endpoint),
+                    methods=[method],
+                    name=func.__name__,
+                ),
             )
+            self.extractors[func.__name__] = extractors
+            self.functions[func.__name__] = func
+            PATH_FUNCTIONS[path_function_id] = route_endpoint
+            PATH_FUNCTION_ROUTERS[path_function_id] = self
 
             def get_url(
                 **kwargs: Any,
@@ -326,36 +906,16 @@ class Router(BaseRouter):
                 if self.app is None:
                     msg = "App instance not set on ViewContext"
                     raise ValueError(msg)
-                query_params: dict[str, Any] = {}
-                for name, param in signature(func).parameters.items():
-                    if name == "request":
-                        continue
-                    args = get_annotated(param)
-                    if args and args[1] == "query_param":
-                        try:
-                            query_params[name] = kwargs.pop(name)
-                        except KeyError as e:
-                            msg = f"missing query parameter {name} for {func.__name__}"
-                            raise ValueError(msg) from e
-                base_url = self.app.url_path_for(func.__name__, **kwargs)
-                if query_params != {}:
-                    for idx, (name, param) in enumerate(query_params.items()):
-                        if idx == 0:
-                            base_url = URLPath(
-                                f"{base_url}?{name}={escape(str(param), quote=True)}",
-                            )
-                        else:
-                            base_url = URLPath(
-                                f"{base_url}&{name}={escape(str(param), quote=True)}",
-                            )
-                return base_url
+                return self.app.url_builders[func.__name__](**kwargs)
 
+            # lets `Request.url_of` find the route from the decorated function
+            get_url.__name__ = func.__name__
             return get_url
 
         return decorator
 
 
-def update_js_constants(config: BaseConfig) -> None:
+def update_js_constants(config: "BaseConfig") -> None:
     with config.JS_CONSTANTS_PATH.open("w") as f:
         f.write("export const CONSTANTS = {\n")
         for name in _COMPONENT_NAMES:
@@ -365,40 +925,100 @@ def update_js_constants(config: BaseConfig) -> None:
 
 async def intermediary_hot_replace_templates(
     sr: asyncio.StreamReader,
-    _: asyncio.StreamWriter,
+    sw: asyncio.StreamWriter,
+    *,
+    graph: "ModuleGraph | None" = None,
+    thread_pool: ThreadPool | None = None,
+    broadcaster: Broadcaster | None = None,
 ) -> None:
+    from relax.ipc import read_message, write_message
+
+    # the reloader keeps its connection open, and sends changes as they happen
     try:
-        data = await sr.read(1024)
-        result = json.loads(data)
-        if result["event_type"] == "update_views":
-            await hot_replace_templates(result["data"])
+        while (message := await read_message(sr)) is not None:
+            restart = False
+            if message["event_type"] == "update_views":
+                restart = await hot_replace_templates(
+                    message["data"],
+                    graph=graph,
+                    thread_pool=thread_pool,
+                    broadcaster=broadcaster,
+                )
+            # the reloader restarts the app when it can't be updated in place
+            await write_message(sw, {"restart": restart})
     except Exception as e:  # noqa: BLE001
         print(e)  # noqa: T201
+    finally:
+        sw.close()
+
+
+def _reload_module(name: str) -> None:
+    if name in IMPORTS:
+        IMPORTS[name] = importlib.reload(IMPORTS[name])
+    else:
+        IMPORTS[name] = importlib.import_module(name)
+        IMPORTS[name] = importlib.reload(IMPORTS[name])
 
 
-async def hot_replace_templates(changed_paths: list[str]) -> None:
+async def hot_replace_templates(
+    changed_paths: list[str],
+    *,
+    graph: "ModuleGraph | None" = None,
+    thread_pool: ThreadPool | None = None,
+    broadcaster: Broadcaster | None = None,
+) -> bool:
+    """Reloads the changed template modules and updates the browsers.
+
+    Returns whether the app has to restart instead, because functions of the
+    changed modules changed signature or disappeared, or the modules to reload
+    import each other.
+    """
+    from graphlib import CycleError
+
+    from relax.hmr import module_name, signatures, signatures_changed
+
     try:
-        for str_path in changed_paths:
-            file_path = Path(str_path)
-            str_path = str_path.removesuffix(file_path.suffix)
-            str_path = str_path.replace(os.sep, ".")
-            str_path = str_path.removesuffix(".__init__")
-            if str_path in IMPORTS:
-                IMPORTS[str_path] = importlib.reload(IMPORTS[str_path])
-            else:
-                IMPORTS[str_path] = importlib.import_module(str_path)
-                IMPORTS[str_path] = importlib.reload(IMPORTS[str_path])
+        changed_modules = {module_name(Path(path)) for path in changed_paths}
+        before = {
+            name: signatures(sys.modules[name])
+            for name in changed_modules
+            if name in sys.modules
+        }
+        # modules importing the changed ones keep references to their old
+        # functions until they're reloaded too, after them
+        reload_order = sorted(changed_modules)
+        if graph is not None:
+            graph.scan()
+            try:
+                reload_order = graph.reload_order(changed_modules)
+            except CycleError as e:
+                logger.warning("import cycle between templates: %s", e.args[1])
+                return True
+        for name in reload_order:
+            _reload_module(name)
+        for name, old in before.items():
+            if changed := signatures_changed(old, signatures(IMPORTS[name])):
+                logger.warning("signatures changed in %s: %s", name, changed)
+                return True
 
         logger.warning("reloaded changes")
-        new_views = load_views()
+        for layout in Layout.instances.values():
+            layout.invalidate()
+        # only components from the reloaded modules can render differently
+        affected_modules = set(reload_order) if graph is not None else None
+        # views no browser shows aren't rendered
+        mounted = broadcaster.mounted_ids() if broadcaster is not None else None
+        new_views = await render_views(
+            thread_pool or ThreadPool(),
+            affected_modules,
+            mounted,
+        )
         logger.warning("loaded views")
-        if new_views is not None:
-            for client in CLIENTS:
-                await client.send_text(
-                    json.dumps({"event_type": "update_views", "data": new_views}),
-                )
-            logger.warning("updated browser")
-        else:
+        if new_views is None:
             logger.warning("no data to update server with")
+        elif broadcaster is not None:
+            broadcaster.publish_views(new_views)
+            logger.warning("updated browser")
     except Exception as e:  # noqa: BLE001
         print(e)  # noqa: T201
+    return False
@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Sequence
+from time import monotonic
+from typing import NamedTuple
+
+from starlette.authentication import (
+    AuthCredentials,
+    AuthenticationBackend,
+    AuthenticationError,
+    BaseUser,
+    UnauthenticatedUser,
+    requires,
+)
+from starlette.requests import HTTPConnection, Request
+from starlette.responses import PlainTextResponse, Response
+
+AuthResult = tuple[AuthCredentials, BaseUser] | None
+
+
+def credentials_key(conn: HTTPConnection) -> str | None:
+    return conn.headers.get("Authorization") or conn.headers.get("Cookie")
+
+
+class _Entry(NamedTuple):
+    result: AuthResult
+    created_at: float
+
+
+class CachedAuthBackend(AuthenticationBackend):
+    """Caches what another auth backend resolves, for `ttl` seconds.
+
+    Entries are keyed by the request's credentials (`key`, by default the
+    Authorization or Cookie header), so the wrapped backend, and the session
+    store behind it, is only hit on a miss. Requests without credentials
+    aren't cached. Call `invalidate` on logout or when a user changes.
+    """
+
+    def __init__(
+        self,
+        backend: AuthenticationBackend,
+        ttl: float,
+        *,
+        key: Callable[[HTTPConnection], str | None] = credentials_key,
+        max_size: int = 1024,
+    ) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.key = key
+        self.max_size = max_size
+        self.entries: OrderedDict[str, _Entry] = OrderedDict()
+
+    async def authenticate(self, conn: HTTPConnection) -> AuthResult:
+        if (key := self.key(conn)) is None:
+            return await self.backend.authenticate(conn)
+        entry = self.entries.get(key)
+        if entry is not None and monotonic() - entry.created_at < self.ttl:
+            self.entries.move_to_end(key)
+            return entry.result
+        # errors aren't cached, the backend is tried again on the next request
+        result = await self.backend.authenticate(conn)
+        self.entries[key] = _Entry(result, monotonic())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return result
+
+    def invalidate(self, key: str | None = None) -> None:
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+
+async def authenticate(conn: HTTPConnection, backend: AuthenticationBackend) -> None:
+    # requests already authenticated by starlette's AuthenticationMiddleware
+    # are left alone
+    if "auth" in conn.scope:
+        return
+    result = await backend.authenticate(conn)
+    conn.scope["auth"], conn.scope["user"] = result or (
+        AuthCredentials(),
+        UnauthenticatedUser(),
+    )
+
+
+def protected(
+    endpoint: Callable[[Request], Awaitable[Response]],
+    scopes: Sequence[str],
+) -> Callable[[Request], Awaitable[Response]]:
+    checked = requires(list(scopes))(endpoint)
+
+    async def inner(request: Request) -> Response:
+        backend: AuthenticationBackend | None = getattr(
+            request.app,
+            "auth_backend",
+            None,
+        )
+        if backend is not None:
+            try:
+                await authenticate(request, backend)
+            except AuthenticationError as e:
+                return PlainTextResponse(str(e), status_code=400)
+        return await checked(request)
+
+    return inner
@@ -0,0 +1,176 @@
+import asyncio
+import contextlib
+import json
+import logging
+from typing import Any, NamedTuple
+
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+logger = logging.getLogger(__name__)
+
+# messages waiting for a client before it's considered too slow
+DEFAULT_QUEUE_SIZE = 16
+# seconds a single send may take before the client is dropped
+DEFAULT_SEND_TIMEOUT = 5.0
+
+
+class BroadcastStats(NamedTuple):
+    connections: int
+    queued: int
+    max_queue_depth: int
+    dropped: int
+
+
+class _Client:
+    __slots__ = ("mounted", "queue", "task")
+
+    def __init__(self, queue: "asyncio.Queue[str]", task: "asyncio.Task[None]") -> None:
+        self.queue = queue
+        self.task = task
+        # ids of the elements the page shows, once it reported them
+        self.mounted: set[str] | None = None
+
+
+class Broadcaster:
+    """Sends messages to every connected websocket, like HMR updates.
+
+    Messages are serialized once and put in a bounded queue per client, each
+    drained by its own task, so a slow or dead browser tab doesn't hold up the
+    others. Clients whose queue is full, or whose send times out, are
+    disconnected; browsers reconnect, but updates sent meanwhile are lost
+    until the page is reloaded.
+
+    Pages report the ids of the elements they show (a `mounted` event), and
+    `publish_views` only sends them the views with those ids.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        send_timeout: float = DEFAULT_SEND_TIMEOUT,
+    ) -> None:
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.clients: dict[WebSocket, _Client] = {}
+        self.dropped = 0
+        self._closing: set[asyncio.Task[None]] = set()
+
+    def connect(self, websocket: WebSocket) -> None:
+        queue: asyncio.Queue[str] = asyncio.Queue(self.queue_size)
+        task = asyncio.create_task(self._send_from(websocket, queue))
+        self.clients[websocket] = _Client(queue, task)
+
+    def disconnect(self, websocket: WebSocket) -> None:
+        if (client := self.clients.pop(websocket, None)) is None:
+            return
+        client.task.cancel()
+        # unsent messages are discarded, so `drain` doesn't wait on them
+        while not client.queue.empty():
+            client.queue.get_nowait()
+            client.queue.task_done()
+
+    async def serve(self, websocket: WebSocket) -> None:
+        await websocket.accept()
+        logger.debug("got new websocket connection")
+        self.connect(websocket)
+        try:
+            while True:
+                data = await websocket.receive_text()
+                logger.debug("got new data: %s", data)
+                self._receive(websocket, data)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.disconnect(websocket)
+
+    def publish(self, message: Any) -> None:
+        data = json.dumps(message)
+        for websocket, client in list(self.clients.items()):
+            self._put(websocket, client, data)
+
+    def publish_views(self, views: dict[str, str]) -> None:
+        # tabs showing the same elements share a payload
+        payloads: dict[tuple[str, ...], str] = {}
+        for websocket, client in list(self.clients.items()):
+            ids = tuple(
+                views
+                if client.mounted is None
+                else (id for id in views if id in client.mounted),
+            )
+            if not ids:
+                continue
+            if (data := payloads.get(ids)) is None:
+                data = payloads[ids] = json.dumps(
+                    {
+                        "event_type": "update_views",
+                        "data": {id: views[id] for id in ids},
+                    },
+                )
+            self._put(websocket, client, data)
+
+    def mounted_ids(self) -> set[str] | None:
+        """Ids shown by any client, or None when some client didn't say."""
+        ids: set[str] = set()
+        for client in self.clients.values():
+            if client.mounted is None:
+                return None
+            ids |= client.mounted
+        return ids
+
+    async def drain(self) -> None:
+        """Waits until every published message was sent or discarded."""
+        await asyncio.gather(
+            *(client.queue.join() for client in self.clients.values()),
+        )
+
+    def stats(self) -> BroadcastStats:
+        depths = [client.queue.qsize() for client in self.clients.values()]
+        return BroadcastStats(
+            connections=len(depths),
+            queued=sum(depths),
+            max_queue_depth=max(depths, default=0),
+            dropped=self.dropped,
+        )
+
+    def _put(self, websocket: WebSocket, client: _Client, data: str) -> None:
+        try:
+            client.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            logger.warning("dropping websocket client falling behind")
+            self._drop(websocket)
+
+    def _receive(self, websocket: WebSocket, data: str) -> None:
+        try:
+            message = json.loads(data)
+            if message["event_type"] == "mounted":
+                self.clients[websocket].mounted = set(message["data"])
+        except (ValueError, TypeError, KeyError):
+            logger.debug("ignoring unknown websocket message: %s", data)
+
+    def _drop(self, websocket: WebSocket) -> None:
+        self.dropped += 1
+        self.disconnect(websocket)
+        # closing may block on the same slow client, so it's not waited on
+        task = asyncio.create_task(self._close(websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket) -> None:
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(websocket.close(), self.send_timeout)
+
+    async def _send_from(
+        self,
+        websocket: WebSocket,
+        queue: "asyncio.Queue[str]",
+    ) -> None:
+        while True:
+            data = await queue.get()
+            try:
+                await asyncio.wait_for(websocket.send_text(data), self.send_timeout)
+            except Exception:  # noqa: BLE001
+                logger.warning("dropping websocket client failing to receive")
+                self._drop(websocket)
+                return
+            finally:
+                queue.task_done()
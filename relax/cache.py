@@ -0,0 +1,205 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass
+from http import HTTPStatus
+from time import monotonic
+from typing import Any, Protocol
+from urllib.parse import urlencode
+
+import starlette.requests
+import starlette.responses
+
+logger = logging.getLogger(__name__)
+
+# headers meant for the client that got the response, never replayed to others
+PRIVATE_HEADERS = frozenset((b"set-cookie",))
+
+# a coroutine function, so its call can be scheduled as a task
+Handler = Callable[
+    [starlette.requests.Request],
+    Coroutine[Any, Any, starlette.responses.Response],
+]
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    body: bytes
+    status_code: int
+    headers: list[tuple[bytes, bytes]]
+    created_at: float
+
+    def to_response(self) -> starlette.responses.Response:
+        response = starlette.responses.Response(self.body, self.status_code)
+        response.raw_headers = list(self.headers)
+        return response
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> CachedResponse | None: ...
+
+    async def set(self, key: str, value: CachedResponse) -> None: ...
+
+    async def delete_prefix(self, prefix: str) -> None: ...
+
+
+class InMemoryCacheBackend:
+    def __init__(self, max_size: int = 1024) -> None:
+        self.max_size = max_size
+        self.entries: OrderedDict[str, CachedResponse] = OrderedDict()
+
+    async def get(self, key: str) -> CachedResponse | None:
+        if (entry := self.entries.get(key)) is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, value: CachedResponse) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self.entries if key.startswith(prefix)]:
+            del self.entries[key]
+
+
+def cache_key(request: starlette.requests.Request) -> str:
+    # encoded again, so an `&` or `=` in a value can't pass for another param
+    query = urlencode(sorted(request.query_params.multi_items()))
+    # htmx requests get a partial, others the full page, so they never share
+    variant = "htmx" if request.scope.get("from_htmx") else "page"
+    return f"{request.url.path}?{query}#{variant}"
+
+
+class RouteCache:
+    """Caches successful GET responses of a path function.
+
+    Entries are fresh for `ttl` seconds. For `stale_while_revalidate` more
+    seconds, the stale entry is still served while it is refreshed in the
+    background.
+
+    Entries are shared by everyone requesting the same URL, so only routes
+    whose responses don't depend on who asks can be cached: routes with auth
+    scopes can't, and cookies set by the handler aren't stored.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        *,
+        stale_while_revalidate: float = 0,
+        max_size: int = 1024,
+        backend: CacheBackend | None = None,
+    ) -> None:
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.backend = (
+            backend if backend is not None else InMemoryCacheBackend(max_size)
+        )
+        # set to the route name when used by a path function, so several
+        # routes can share a backend
+        self.namespace = ""
+        self._refreshing: dict[str, asyncio.Task] = {}
+
+    def key(self, request: starlette.requests.Request) -> str:
+        return f"{self.namespace}:{cache_key(request)}"
+
+    async def invalidate(self, path: str | None = None) -> None:
+        if path is None:
+            await self.backend.delete_prefix(f"{self.namespace}:")
+        else:
+            await self.backend.delete_prefix(f"{self.namespace}:{path}?")
+
+    async def respond(
+        self,
+        request: starlette.requests.Request,
+        handler: Handler,
+    ) -> starlette.responses.Response:
+        key = self.key(request)
+        entry = await self.backend.get(key)
+        if entry is not None:
+            age = monotonic() - entry.created_at
+            if age < self.ttl:
+                return entry.to_response()
+            if age < self.ttl + self.stale_while_revalidate:
+                if key not in self._refreshing:
+                    task = asyncio.create_task(self._refresh(key, request, handler))
+                    self._refreshing[key] = task
+                return entry.to_response()
+        response = await handler(request)
+        await self.store(key, response)
+        return response
+
+    async def store(self, key: str, response: starlette.responses.Response) -> None:
+        # streamed responses have no body to keep
+        if response.status_code != HTTPStatus.OK or not hasattr(response, "body"):
+            return
+        await self.backend.set(
+            key,
+            CachedResponse(
+                body=response.body,
+                status_code=response.status_code,
+                headers=[
+                    (key, value)
+                    for key, value in response.raw_headers
+                    if key not in PRIVATE_HEADERS
+                ],
+                created_at=monotonic(),
+            ),
+        )
+
+    async def _refresh(
+        self,
+        key: str,
+        request: starlette.requests.Request,
+        handler: Handler,
+    ) -> None:
+        try:
+            await self.store(key, await handler(request))
+        except Exception:
+            logger.exception("failed refreshing cached response for %s", key)
+        finally:
+            del self._refreshing[key]
+
+
+class SingleFlight:
+    """Shares one handler execution between identical concurrent requests.
+
+    The first request for a key runs the handler, and requests for the same
+    key arriving before it finishes wait for it and get a copy of its
+    response, without its cookies. Responses without a body (streamed ones)
+    can't be shared, so only the first request gets those and the others run
+    the handler.
+
+    Like `RouteCache`, it only fits routes whose responses don't depend on who
+    asks, so not routes with auth scopes.
+    """
+
+    def __init__(self) -> None:
+        self.in_flight: dict[str, asyncio.Task[starlette.responses.Response]] = {}
+
+    async def do(
+        self,
+        key: str,
+        request: starlette.requests.Request,
+        handler: Handler,
+    ) -> starlette.responses.Response:
+        if (task := self.in_flight.get(key)) is None:
+            task = asyncio.create_task(handler(request))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+            # the handler runs in its own task, so a disconnecting client
+            # doesn't cancel it for everyone waiting on it
+            return await asyncio.shield(task)
+        response = await asyncio.shield(task)
+        if not hasattr(response, "body"):
+            return await handler(request)
+        shared = starlette.responses.Response(response.body, response.status_code)
+        shared.raw_headers = [
+            (key, value)
+            for key, value in response.raw_headers
+            if key not in PRIVATE_HEADERS
+        ]
+        return shared
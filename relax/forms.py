@@ -0,0 +1,210 @@
+from collections.abc import Callable
+from dataclasses import MISSING, fields, is_dataclass
+from types import NoneType, UnionType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+from starlette.datastructures import FormData, Headers, UploadFile
+from starlette.exceptions import HTTPException
+from starlette.formparsers import FormParser, MultiPartException, MultiPartParser
+from starlette.requests import Request
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+# uploads bigger than this are rolled over from memory to a file on disk
+SPOOL_MAX_SIZE = 1024 * 1024
+TRUTHY_VALUES = frozenset(("true", "on", "1", "yes"))
+
+FormDecoder = Callable[[FormData], Any]
+# decoders are compiled once per form shape
+FORM_DECODERS: dict[type, FormDecoder] = {}
+
+
+class UploadTooLargeError(MultiPartException): ...
+
+
+class LimitedMultiPartParser(MultiPartParser):
+    def __init__(
+        self,
+        headers: Headers,
+        stream: AsyncGenerator[bytes, None],
+        *,
+        max_files: float = 1000,
+        max_fields: float = 1000,
+        max_upload_size: int | None = None,
+        spool_max_size: int = SPOOL_MAX_SIZE,
+    ) -> None:
+        super().__init__(headers, stream, max_files=max_files, max_fields=max_fields)
+        # starlette uses this as the in-memory size of the spooled upload files
+        self.max_file_size = spool_max_size
+        self.max_upload_size = max_upload_size
+        self._current_upload_size = 0
+
+    def on_part_begin(self) -> None:
+        super().on_part_begin()
+        self._current_upload_size = 0
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._current_part.file is not None and self.max_upload_size is not None:
+            self._current_upload_size += end - start
+            if self._current_upload_size > self.max_upload_size:
+                msg = (
+                    f"Uploaded file is too large. Maximum size is "
+                    f"{self.max_upload_size} bytes."
+                )
+                raise UploadTooLargeError(msg)
+        super().on_part_data(data, start, end)
+
+
+async def read_form(
+    request: Request,
+    *,
+    max_files: float = 1000,
+    max_fields: float = 1000,
+    max_upload_size: int | None = None,
+    spool_max_size: int = SPOOL_MAX_SIZE,
+) -> FormData:
+    if request._form is not None:
+        return request._form
+    content_type = request.headers.get("Content-Type", "")
+    if content_type.startswith("multipart/form-data"):
+        parser = LimitedMultiPartParser(
+            request.headers,
+            request.stream(),
+            max_files=max_files,
+            max_fields=max_fields,
+            max_upload_size=max_upload_size,
+            spool_max_size=spool_max_size,
+        )
+        try:
+            request._form = await parser.parse()
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=e.message) from e
+        except MultiPartException as e:
+            raise HTTPException(status_code=400, detail=e.message) from e
+    elif content_type.startswith("application/x-www-form-urlencoded"):
+        request._form = await FormParser(request.headers, request.stream()).parse()
+    else:
+        request._form = FormData()
+    return request._form
+
+
+def _is_optional(annotation: Any) -> bool:
+    origin = get_origin(annotation)
+    return (origin is Union or origin is UnionType) and NoneType in get_args(
+        annotation,
+    )
+
+
+def _value_converter(annotation: Any) -> Callable[[str | UploadFile], Any]:
+    if _is_optional(annotation):
+        inner_types = [arg for arg in get_args(annotation) if arg is not NoneType]
+        convert = _value_converter(inner_types[0])
+        return lambda value: None if value == "" else convert(value)
+    if annotation is UploadFile:
+        return lambda value: value
+    if annotation is bool:
+        return lambda value: str(value).lower() in TRUTHY_VALUES
+    return annotation
+
+
+def _field_decoder(
+    name: str,
+    annotation: Any,
+    default_factory: Callable[[], Any] | None,
+) -> Callable[[FormData], Any]:
+    if get_origin(annotation) is list:
+        (item_type,) = get_args(annotation) or (str,)
+        convert_item = _value_converter(item_type)
+
+        def decode_list(form: FormData) -> list[Any]:
+            values = form.getlist(name)
+            if not values and default_factory is not None:
+                return default_factory()
+            return [convert_item(value) for value in values]
+
+        return decode_list
+
+    convert = _value_converter(annotation)
+    if default_factory is None and _is_optional(annotation):
+        default_factory = lambda: None  # noqa: E731
+    if default_factory is None and annotation is bool:
+        # unchecked checkboxes are not sent at all
+        default_factory = lambda: False  # noqa: E731
+
+    def decode(form: FormData) -> Any:
+        if (value := form.get(name)) is not None:
+            return convert(value)
+        if default_factory is None:
+            raise KeyError(name)
+        return default_factory()
+
+    return decode
+
+
+def _dataclass_decoder(data_shape: type) -> FormDecoder:
+    type_hints = get_type_hints(data_shape)
+    decoders: list[tuple[str, Callable[[FormData], Any]]] = []
+    for field in fields(data_shape):
+        default_factory: Callable[[], Any] | None
+        if field.default is not MISSING:
+            default = field.default
+            default_factory = lambda default=default: default  # noqa: E731
+        elif field.default_factory is not MISSING:
+            default_factory = field.default_factory
+        else:
+            default_factory = None
+        decoders.append(
+            (
+                field.name,
+                _field_decoder(field.name, type_hints[field.name], default_factory),
+            ),
+        )
+
+    def decode(form: FormData) -> Any:
+        return data_shape(**{name: decoder(form) for name, decoder in decoders})
+
+    return decode
+
+
+def _model_decoder(data_shape: "type[BaseModel]") -> FormDecoder:
+    from pydantic import TypeAdapter
+
+    adapter = TypeAdapter(data_shape)
+    list_fields = frozenset(
+        name
+        for name, field in data_shape.model_fields.items()
+        if get_origin(field.annotation) is list
+    )
+
+    def decode(form: FormData) -> Any:
+        data: dict[str, Any] = {}
+        for name in form:
+            data[name] = form.getlist(name) if name in list_fields else form[name]
+        return adapter.validate_python(data)
+
+    return decode
+
+
+def form_decoder(data_shape: type) -> FormDecoder:
+    if (decoder := FORM_DECODERS.get(data_shape)) is not None:
+        return decoder
+    if is_dataclass(data_shape):
+        decoder = _dataclass_decoder(data_shape)
+    else:
+        from pydantic import BaseModel
+
+        if not issubclass(data_shape, BaseModel):
+            msg = "data_shape for form must be a pydantic model or a dataclass"
+            raise TypeError(msg)
+        decoder = _model_decoder(data_shape)
+    FORM_DECODERS[data_shape] = decoder
+    return decoder
@@ -0,0 +1,149 @@
+import ast
+import graphlib
+import importlib.util
+import os
+import sys
+from collections.abc import Callable, Iterable
+from inspect import Parameter, formatannotation, signature
+from pathlib import Path
+from types import ModuleType
+
+
+def module_name(path: Path) -> str:
+    # changed paths are relative to the working directory, like the imports
+    name = str(path.with_suffix("")).replace(os.sep, ".")
+    return name.removesuffix(".__init__")
+
+
+def _imported_modules(tree: ast.Module, name: str, *, is_package: bool) -> set[str]:
+    package = name if is_package else name.rpartition(".")[0]
+    imported: set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = importlib.util.resolve_name(
+                "." * node.level + (node.module or ""),
+                package,
+            )
+            imported.add(base)
+            # `from package import module` imports a module too
+            imported.update(f"{base}.{alias.name}" for alias in node.names)
+    return imported
+
+
+# literal defaults are compared by value, others only by type, since their
+# repr often has the object's address, which changes on every reload
+_LITERALS = (type(None), bool, int, float, complex, str, bytes)
+
+ParamShape = tuple[str, str, str, str]
+
+
+def _default_shape(default: object) -> str:
+    if default is Parameter.empty:
+        return ""
+    if isinstance(default, _LITERALS):
+        return repr(default)
+    if isinstance(default, type):
+        return f"class {formatannotation(default)}"
+    return formatannotation(type(default))
+
+
+def _signature_shape(obj: Callable[..., object]) -> tuple[ParamShape, ...]:
+    sig = signature(obj)
+    params = tuple(
+        (
+            param.name,
+            param.kind.name,
+            formatannotation(param.annotation),
+            _default_shape(param.default),
+        )
+        for param in sig.parameters.values()
+    )
+    return (*params, ("return", "", formatannotation(sig.return_annotation), ""))
+
+
+def signatures(module: ModuleType) -> dict[str, tuple[ParamShape, ...]]:
+    # functions and classes defined in the module, like components
+    found: dict[str, tuple[ParamShape, ...]] = {}
+    for name, obj in vars(module).items():
+        if callable(obj) and getattr(obj, "__module__", None) == module.__name__:
+            try:
+                found[name] = _signature_shape(obj)
+            except (TypeError, ValueError):
+                continue
+    return found
+
+
+def signatures_changed(
+    before: dict[str, tuple[ParamShape, ...]],
+    after: dict[str, tuple[ParamShape, ...]],
+) -> list[str]:
+    # new functions can't be used by code that wasn't reloaded yet
+    return [name for name, sig in before.items() if after.get(name) != sig]
+
+
+class ModuleGraph:
+    """Imports between the loaded modules of a directory, read from their source.
+
+    Files are only parsed again when they were modified since the last scan.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root.resolve()
+        self.imports: dict[str, set[str]] = {}
+        self._mtimes: dict[str, float] = {}
+
+    def scan(self) -> None:
+        for name, module in list(sys.modules.items()):
+            file = getattr(module, "__file__", None)
+            if file is not None and Path(file).resolve().is_relative_to(self.root):
+                self.update(name, Path(file))
+
+    def update(self, name: str, path: Path) -> None:
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            self.imports.pop(name, None)
+            self._mtimes.pop(name, None)
+            return
+        if self._mtimes.get(name) == mtime:
+            return
+        try:
+            tree = ast.parse(path.read_bytes(), str(path))
+        except SyntaxError:
+            # the import fails with a better error, keep the last known imports
+            return
+        self.imports[name] = _imported_modules(
+            tree,
+            name,
+            is_package=path.name == "__init__.py",
+        )
+        self._mtimes[name] = mtime
+
+    def dependents(self, modules: Iterable[str]) -> set[str]:
+        """The given modules, and every module importing them, even indirectly."""
+        importers: dict[str, set[str]] = {}
+        for name, imported in self.imports.items():
+            for dependency in imported:
+                importers.setdefault(dependency, set()).add(name)
+        found = set(modules)
+        pending = list(found)
+        while pending:
+            for importer in importers.get(pending.pop(), ()):
+                if importer not in found:
+                    found.add(importer)
+                    pending.append(importer)
+        return found
+
+    def reload_order(self, modules: Iterable[str]) -> list[str]:
+        """The modules to reload after the given ones changed, each one after
+        the modules it imports.
+
+        Raises `graphlib.CycleError` when they import each other.
+        """
+        affected = self.dependents(modules)
+        sorter: graphlib.TopologicalSorter[str] = graphlib.TopologicalSorter()
+        for name in affected:
+            sorter.add(name, *(self.imports.get(name, set()) & affected))
+        return list(sorter.static_order())
@@ -3,9 +3,11 @@ import sys
 from pathlib import Path
 from collections.abc import Iterable
 from html import escape
-from typing import Literal, Protocol, Self, Sequence, TypeVar
+from typing import TYPE_CHECKING, Literal, Protocol, Self, Sequence, TypeVar
 
-from starlette.datastructures import URL
+if TYPE_CHECKING:
+    # only used in annotations, it would be the sole starlette import here
+    from starlette.datastructures import URL
 
 HREFTarget = Literal["_blank", "_self", "_parent", "_top"]
 
@@ -50,7 +52,7 @@ class Element(Protocol):
 
     def hx_get(
         self,
-        target: str | URL,
+        target: "str | URL",
         hx_encoding: Literal["multipart/form-data"] | None = None,
         hx_target: str | Self | None = None,
         hx_swap: Literal[
@@ -136,7 +138,7 @@ class SelfClosingTag(Element):
     def _htmx(
         self,
         request_type: HTMXRequestType,
-        target: str | URL,
+        target: "str | URL",
         hx_encoding: Literal["multipart/form-data"] | None = None,
         hx_target: str | Self | None = None,
         hx_swap: Literal[
@@ -175,7 +177,7 @@ class SelfClosingTag(Element):
 
     def hx_get(
         self,
-        target: str | URL,
+        target: "str | URL",
         hx_encoding: Literal["multipart/form-data"] | None = None,
         hx_target: str | Self | None = None,
         hx_swap: Literal[
@@ -195,7 +197,7 @@ class SelfClosingTag(Element):
 
     def hx_post(
         self,
-        target: str | URL,
+        target: "str | URL",
         hx_encoding: Literal["multipart/form-data"] | None = None,
         hx_target: str | Self | None = None,
         hx_swap: Literal[
@@ -215,7 +217,7 @@ class SelfClosingTag(Element):
 
     def hx_put(
         self,
-        target: str | URL,
+        target: "str | URL",
         hx_encoding: Literal["multipart/form-data"] | None = None,
         hx_target: str | Self | None = None,
         hx_swap: Literal[
@@ -235,7 +237,7 @@ class SelfClosingTag(Element):
 
     def hx_delete(
         self,
-        target: str | URL,
+        target: "str | URL",
         hx_encoding: Literal["multipart/form-data"] | None = None,
         hx_target: str | Self | None = None,
         hx_swap: Literal[
@@ -411,7 +413,7 @@ class a(Tag):
 
     def __init__(
         self,
-        href: str | URL,
+        href: "str | URL",
         target: HREFTarget | None = None,
         classes: list[str] | None = None,
         attrs: dict | None = None,
@@ -620,6 +622,14 @@ class link(SelfClosingTag):
         if type is not None:
             self._attributes["type"] = type
 
+    @classmethod
+    def asset(cls, name: str, rel: str = "stylesheet") -> Self:
+        """A link to a static asset, by its name before fingerprinting."""
+        # only apps serving static assets need it, and it imports starlette
+        from relax.static import asset_url
+
+        return cls(href=asset_url(name), rel=rel)
+
 
 class title(Tag):
     name = "title"
@@ -664,6 +674,19 @@ class script(Tag):
         if type is not None:
             self._attributes["type"] = type
 
+    @classmethod
+    def asset(
+        cls,
+        name: str,
+        *,
+        type: Literal["importmap", "module", "speculationrules"] | None = None,
+        defer: bool = False,
+    ) -> Self:
+        """A script from a static asset, by its name before fingerprinting."""
+        from relax.static import asset_url
+
+        return cls(src=asset_url(name), type=type, defer=defer)
+
     # sorry mate can't help you escape that
     # your risk
     def _render_children(self) -> str:
@@ -1,12 +1,23 @@
-import json
-from pathlib import Path
+import threading
 import warnings
 from collections.abc import Callable
-from functools import wraps
+from contextvars import ContextVar, Token
+from functools import cache, wraps
 from inspect import _ParameterKind, signature
-from typing import Any, Awaitable, ParamSpec, TypeVar, Protocol, Self
+from typing import (
+    Any,
+    Awaitable,
+    NamedTuple,
+    ParamSpec,
+    Protocol,
+    Self,
+    TypedDict,
+    TypeVar,
+)
 
 from relax.html import Component, Element
+from relax.profiling import label
+from relax.timing import measure
 
 """
 A simple dependency injection helper.
@@ -37,6 +48,20 @@ Running this will print:
 string with default value
 injected string
 ```
+
+Providers are factories whose own keyword-only `Injected` params are resolved
+from other injectables or providers. Each is built once, after its own
+dependencies, the first time it's needed (or when `resolve_providers` builds
+them all). Apps check the graph for cycles and missing dependencies when
+starting up, which `check_providers` does without building anything:
+```python
+def make_database(*, config: Config = Injected) -> Database:
+    return Database(config.DB_URL)
+
+add_provider(Database, make_database)
+add_provider(UserRepo, UserRepo)  # UserRepo.__init__ takes `db: Database = Injected`
+check_providers()
+```
 """
 
 
@@ -49,7 +74,7 @@ class IncorrectInjectableSignatureError(Exception): ...
 class DoubleInjectionError(Exception): ...
 
 
-_INJECTS: dict[object, object] = {}
+class CircularDependencyError(Exception): ...
 
 
 class _Injected: ...
@@ -61,14 +86,7 @@ Injected: Any = _Injected
 _P = ParamSpec("_P")
 _T = TypeVar("_T")
 
-COMPONENTS_CACHE_FILE = Path("/tmp/relax_components.json")
-if not COMPONENTS_CACHE_FILE.exists():
-    COMPONENTS_CACHE_FILE.touch()
-COMPONENTS_CACHE_FILE = COMPONENTS_CACHE_FILE.open("r+")
-COMPONENTS_CACHE_FILE.seek(0)
-COMPONENTS_CACHE_FILE.truncate()
-COMPONENTS_CACHE_FILE.write("{}")
-COMPONENTS_CACHE_FILE.seek(0)
+# component names are registered when decorating, so they are process-wide
 _COMPONENT_NAMES: list[str] = []
 
 
@@ -82,7 +100,9 @@ class Jsonable(Protocol):
     ) -> Self: ...
 
 
-def inject_into_kwargs(func: Callable, kwargs: Any) -> None:
+@cache
+def _injection_plan(func: Callable) -> list[tuple[str, object]]:
+    plan: list[tuple[str, object]] = []
     for name, sig in signature(func).parameters.items():
         if sig.default is _Injected:
             if sig.kind is not _ParameterKind.KEYWORD_ONLY:
@@ -91,16 +111,176 @@ def inject_into_kwargs(func: Callable, kwargs: Any) -> None:
                     f"{func.__name__} must be keyword-only"
                 )
                 raise IncorrectInjectableSignatureError(msg)
+            plan.append((name, sig.annotation))
+    return plan
+
+
+class View(TypedDict):
+    path: str
+    data: dict[str, Any]
+    signature: str
+
+
+class Container:
+    """Injectables, providers and rendered component views of one app.
+
+    Use it as a context manager to make it the current container; outside of
+    any, the module-level default container is used.
+    """
+
+    def __init__(self) -> None:
+        self.injects: dict[object, object] = {}
+        self.providers: dict[object, Callable[..., object]] = {}
+        self.views: dict[str, View] = {}
+        # views are only needed to re-render components on hot reload, which
+        # turns this on
+        self.record_views = False
+        self._providers_order: list[object] | None = None
+        # sync handlers and components inject from worker threads, and each
+        # provider must only be built once
+        self._providers_lock = threading.RLock()
+
+    def __enter__(self) -> Self:
+        # tokens are kept per context, since concurrent requests enter the
+        # same container from different tasks
+        _CONTAINER_TOKENS.set((*_CONTAINER_TOKENS.get(), _CONTAINER.set(self)))
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        *tokens, token = _CONTAINER_TOKENS.get()
+        _CONTAINER.reset(token)
+        _CONTAINER_TOKENS.set(tuple(tokens))
+
+    def copy(self) -> "Container":
+        """A new container with the same injectables and providers."""
+        container = Container()
+        container.injects.update(self.injects)
+        container.providers.update(self.providers)
+        return container
+
+    def add_injectable(self, annotation: object, injectable: object) -> None:
+        if annotation in self.injects or annotation in self.providers:
+            msg = f"Injectable {annotation} already added"
+            raise DoubleInjectionError(msg)
+        self.injects[annotation] = injectable
+
+    def add_provider(
+        self,
+        annotation: object,
+        provider: Callable[..., object],
+    ) -> None:
+        if annotation in self.injects or annotation in self.providers:
+            msg = f"Injectable {annotation} already added"
+            raise DoubleInjectionError(msg)
+        self.providers[annotation] = provider
+        self._providers_order = None
+
+    def _sort_providers(self) -> list[object]:
+        order: list[object] = []
+        # annotations currently being visited, in visiting order, to report cycles
+        visiting: list[object] = []
+        visited: set[object] = set()
+
+        def visit(annotation: object) -> None:
+            if annotation in visited:
+                return
+            if annotation in visiting:
+                cycle = [*visiting[visiting.index(annotation) :], annotation]
+                msg = "Circular dependency: " + " -> ".join(map(str, cycle))
+                raise CircularDependencyError(msg)
+            visiting.append(annotation)
+            provider = self.providers[annotation]
+            for name, dependency in _injection_plan(provider):
+                if dependency in self.providers:
+                    visit(dependency)
+                elif dependency not in self.injects:
+                    msg = (
+                        f"Missing dependency for {name}: {dependency} "
+                        f"in provider of {annotation}"
+                    )
+                    raise MissingDependencyError(msg)
+            visiting.pop()
+            visited.add(annotation)
+            order.append(annotation)
+
+        for annotation in self.providers:
+            visit(annotation)
+        return order
+
+    def check_providers(self) -> None:
+        # the graph is validated and sorted once, until another provider is added
+        with self._providers_lock:
+            if self._providers_order is None:
+                self._providers_order = self._sort_providers()
+
+    def resolve_providers(self) -> None:
+        with self._providers_lock:
+            self.check_providers()
+            for annotation in self._providers_order or ():
+                self._build(annotation)
+
+    def resolve_provider(self, annotation: object) -> None:
+        # only the providers the annotation depends on are built
+        with self._providers_lock:
+            self.check_providers()
+            self._build(annotation)
+
+    def _build(self, annotation: object) -> None:
+        # the graph was checked, so there are no cycles nor missing dependencies
+        if annotation in self.injects:
+            return
+        provider = self.providers[annotation]
+        kwargs: dict[str, Any] = {}
+        for _, dependency in _injection_plan(provider):
+            if dependency in self.providers:
+                self._build(dependency)
+        self.inject_into_kwargs(provider, kwargs)
+        self.injects[annotation] = provider(**kwargs)
+
+    def retrieve(self, annotation: type[_T]) -> _T:
+        if annotation not in self.injects and annotation in self.providers:
+            self.resolve_provider(annotation)
+        return self.injects[annotation]  # type: ignore
+
+    def inject_into_kwargs(self, func: Callable, kwargs: Any) -> None:
+        for name, annotation in _injection_plan(func):
             if kwargs.get(name) is not None:
-                pass
-            elif sig.annotation in _INJECTS:
-                kwargs.update({name: _INJECTS[sig.annotation]})
-            else:
-                msg = (
-                    "Missing dependency for "
-                    f"{name}: {sig.annotation} in {func.__name__}"
-                )
-                raise MissingDependencyError(msg)
+                continue
+            if annotation not in self.injects and annotation in self.providers:
+                self.resolve_provider(annotation)
+            try:
+                kwargs[name] = self.injects[annotation]
+            except KeyError:
+                msg = f"Missing dependency for {name}: {annotation} in {func.__name__}"
+                raise MissingDependencyError(msg) from None
+
+    def clear(self) -> None:
+        self.injects.clear()
+        self.providers.clear()
+        self.views.clear()
+        self._providers_order = None
+
+
+_DEFAULT_CONTAINER = Container()
+_CONTAINER: ContextVar[Container] = ContextVar(
+    "relax_container",
+    default=_DEFAULT_CONTAINER,
+)
+_CONTAINER_TOKENS: ContextVar[tuple[Token[Container], ...]] = ContextVar(
+    "relax_container_tokens",
+    default=(),
+)
+# kept for code that reaches into the default container directly
+_INJECTS = _DEFAULT_CONTAINER.injects
+_PROVIDERS = _DEFAULT_CONTAINER.providers
+
+
+def current_container() -> Container:
+    return _CONTAINER.get()
+
+
+def inject_into_kwargs(func: Callable, kwargs: Any) -> None:
+    current_container().inject_into_kwargs(func, kwargs)
 
 
 def injectable(func: Callable[_P, Awaitable[_T]]) -> Callable[_P, Awaitable[_T]]:
@@ -122,18 +302,46 @@ def injectable_sync(func: Callable[_P, _T]) -> Callable[_P, _T]:
 
 
 def add_injectable(annotation: object, injectable: object) -> None:
-    if annotation in _INJECTS:
-        msg = f"Injectable {annotation} already added"
-        raise DoubleInjectionError(msg)
-    _INJECTS[annotation] = injectable
+    current_container().add_injectable(annotation, injectable)
+
+
+def add_provider(annotation: object, provider: Callable[..., object]) -> None:
+    current_container().add_provider(annotation, provider)
+
+
+def check_providers() -> None:
+    current_container().check_providers()
+
+
+def resolve_providers() -> None:
+    current_container().resolve_providers()
 
 
 def retrieve_injectable(annotation: type[_T]) -> _T:
-    return _INJECTS[annotation]
+    return current_container().retrieve(annotation)
 
 
 def clear_injections() -> None:
-    return _INJECTS.clear()
+    return current_container().clear()
+
+
+class ComponentPlan(NamedTuple):
+    takes_id: bool
+    key_params: tuple[str, ...]
+
+
+# plans of every decorated component, and the ones loaded from a manifest
+# that haven't been decorated yet, by "module:name"
+COMPONENTS: dict[str, ComponentPlan] = {}
+COMPONENT_PLANS: dict[str, ComponentPlan] = {}
+
+
+def compile_component_plan(
+    func: Callable,
+    key: Callable[..., str] | str | None,
+) -> ComponentPlan:
+    key_params = tuple(signature(key).parameters) if callable(key) else ()
+    return ComponentPlan("id" in signature(func).parameters, key_params)
 
 
 def component(
@@ -148,6 +356,16 @@ def component(
             msg = f"Component {component_name} already registered"
             warnings.warn(msg, stacklevel=1)
         _COMPONENT_NAMES.append(component_name)
+        label(func, f"component:{component_name}")
+
+        new_func = injectable_sync(func)
+        component_id = f"{func.__module__}:{func.__name__}"
+        # plans computed ahead of time are given by a loaded manifest
+        plan = COMPONENT_PLANS.pop(component_id, None)
+        if plan is None:
+            plan = compile_component_plan(func, key)
+        COMPONENTS[component_id] = plan
+        takes_id, key_params = plan
 
         @wraps(func)
         def inner(**kwargs: Jsonable) -> Component:
@@ -155,36 +373,25 @@ def component(
                 key_val = key
                 elem_id = f"{component_name}-{key_val}"
             elif key:
-                lsig = signature(key)
-                lambda_args = []
-                for p_name in lsig.parameters:
-                    lambda_args.append(kwargs[p_name])
-                key_val = key(*lambda_args)
+                key_val = key(*(kwargs[p_name] for p_name in key_params))
                 elem_id = f"{component_name}-{key_val}"
             else:
                 elem_id = component_name
-            new_func = injectable_sync(func)
-            if "id" in signature(func).parameters:
-                # TODO: don't set the id if it was provided in the kwargs already
-                func_call_result = new_func(id=elem_id, **kwargs)
-            else:
-                func_call_result = new_func(**kwargs)
-            data = {key: to_json(val) for (key, val) in kwargs.items()}
-            # TODO: find a way to do this only in dev mode
-            try:
-                current_views = json.load(COMPONENTS_CACHE_FILE)
-                COMPONENTS_CACHE_FILE.seek(0)
-            except (TypeError, FileNotFoundError):
-                current_views = {}
-            view_key = f"{func.__module__}.{func.__name__}"
-            current_views[elem_id] = {
-                "path": view_key,
-                "data": data,
-                "signature": str(signature(func)),
-            }
-            COMPONENTS_CACHE_FILE.truncate()
-            json.dump(current_views, COMPONENTS_CACHE_FILE)
-            COMPONENTS_CACHE_FILE.seek(0)
+            with measure("component"):
+                if takes_id:
+                    # TODO: don't set the id if it was provided in the kwargs already
+                    func_call_result = new_func(id=elem_id, **kwargs)
+                else:
+                    func_call_result = new_func(**kwargs)
+            container = current_container()
+            if container.record_views:
+                data = {key: to_json(val) for (key, val) in kwargs.items()}
+                view_key = f"{func.__module__}.{func.__name__}"
+                container.views[elem_id] = {
+                    "path": view_key,
+                    "data": data,
+                    "signature": str(signature(func)),
+                }
 
             return func_call_result.set_id(elem_id).classes([component_name])
 
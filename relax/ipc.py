@@ -0,0 +1,135 @@
+"""
+Messages between the reloader process and the app, over the reload socket.
+
+Each message is JSON, prefixed by its length as 4 big-endian bytes, and the
+reloader keeps its connection open between changes. The app answers every
+message, with whether it has to be restarted to pick the changes up.
+"""
+
+import asyncio
+import json
+import struct
+from collections.abc import Iterable
+from pathlib import Path
+from socket import AF_UNIX, SOCK_STREAM, socket
+from time import monotonic
+from typing import Any
+
+HEADER = struct.Struct("!I")
+# far more than the changed paths of a big checkout
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+# seconds between attempts to connect to the app, while it's starting
+RETRY_INTERVAL = 0.5
+
+
+class IPCError(Exception): ...
+
+
+def encode_message(message: Any) -> bytes:
+    data = json.dumps(message).encode()
+    return HEADER.pack(len(data)) + data
+
+
+def _check_size(size: int) -> int:
+    if size > MAX_MESSAGE_SIZE:
+        msg = f"message of {size} bytes is over the {MAX_MESSAGE_SIZE} bytes limit"
+        raise IPCError(msg)
+    return size
+
+
+async def read_message(reader: asyncio.StreamReader) -> Any | None:
+    """The next message, or None when the other side closed the connection."""
+    try:
+        (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            msg = "connection closed in the middle of a message"
+            raise IPCError(msg) from e
+        return None
+    try:
+        return json.loads(await reader.readexactly(_check_size(size)))
+    except asyncio.IncompleteReadError as e:
+        msg = "connection closed in the middle of a message"
+        raise IPCError(msg) from e
+
+
+async def write_message(writer: asyncio.StreamWriter, message: Any) -> None:
+    writer.write(encode_message(message))
+    await writer.drain()
+
+
+def _recv_exactly(sock: socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        if not (chunk := sock.recv(size - len(data))):
+            msg = "connection closed by the app"
+            raise IPCError(msg)
+        data += chunk
+    return bytes(data)
+
+
+class ReloadChannel:
+    """The reloader's connection to the app's reload socket.
+
+    Connecting never waits: while the app isn't listening yet, changed paths
+    are kept and sent together, in one message, with the next changes or the
+    next call to `flush`.
+    """
+
+    def __init__(self, path: Path, timeout: float = 5.0) -> None:
+        self.path = path
+        self.timeout = timeout
+        self.socket: socket | None = None
+        # changed paths not sent yet, in order and without duplicates
+        self.pending: dict[str, None] = {}
+        self._retry_at = 0.0
+
+    def update_views(self, changed_paths: Iterable[str]) -> bool:
+        self.pending.update(dict.fromkeys(changed_paths))
+        return self.flush()
+
+    def flush(self) -> bool:
+        """Sends the pending changes, returns whether the app has to restart."""
+        if not self.pending:
+            return False
+        message = {"event_type": "update_views", "data": list(self.pending)}
+        # a connection opened before the app restarted only fails when used
+        for _ in range(2):
+            if (sock := self._connect()) is None:
+                return False
+            try:
+                sock.sendall(encode_message(message))
+                (size,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+                reply = json.loads(_recv_exactly(sock, _check_size(size)))
+            except TimeoutError:
+                # the app got the changes, but is slow to apply them
+                self.close()
+                self.pending.clear()
+                return False
+            except (OSError, IPCError):
+                self.close()
+                continue
+            self.pending.clear()
+            return bool(reply.get("restart", False))
+        return False
+
+    def close(self) -> None:
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    def _connect(self) -> socket | None:
+        if self.socket is not None:
+            return self.socket
+        if monotonic() < self._retry_at:
+            return None
+        sock = socket(AF_UNIX, SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(str(self.path))
+        except OSError:
+            sock.close()
+            self._retry_at = monotonic() + RETRY_INTERVAL
+            return None
+        self.socket = sock
+        return sock
@@ -2,9 +2,32 @@ let socket = new WebSocket("ws://127.0.0.1:8000/ws");
 addSocketListeners(socket);
 console.log("connected to ws server");
 
+/** tells the server which elements this page shows, so it only sends those */
+function reportMounted() {
+  if (socket.readyState !== WebSocket.OPEN) {
+    return;
+  }
+  const ids = Array.from(document.querySelectorAll("[id]"), (elem) => elem.id);
+  socket.send(JSON.stringify({ event_type: "mounted", data: ids }));
+}
+
+let reportScheduled = false;
+document.addEventListener("htmx:afterSettle", () => {
+  // a swap can settle many elements at once, they're reported together
+  if (reportScheduled) {
+    return;
+  }
+  reportScheduled = true;
+  setTimeout(() => {
+    reportScheduled = false;
+    reportMounted();
+  }, 50);
+});
+
 /** @param {WebSocket} socket **/
 function addSocketListeners(socket) {
   socket.addEventListener("open", (ev) => {
+    reportMounted();
   });
 
   socket.addEventListener("message", (ev) => {
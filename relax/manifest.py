@@ -0,0 +1,204 @@
+"""
+Build-time manifest of an app's routes and components, for fast cold starts.
+
+Building it imports everything, like a regular boot:
+```
+python -m relax.manifest app.main:app_factory relax-manifest.json
+```
+An app loading it gets every route and URL builder right away, but the
+modules defining the path functions are only imported on the first request
+to one of their routes. Parameter extractors and component call plans are
+taken from the manifest instead of inspecting signatures again:
+```python
+def app_factory() -> App:
+    app = App(config=BaseConfig())
+    if MANIFEST_PATH.exists():
+        load_manifest(app, MANIFEST_PATH)
+    else:
+        app.add_router(router)
+    return app
+```
+"""
+
+import argparse
+import importlib
+import json
+import sys
+from collections.abc import Callable
+from inspect import Parameter
+from pathlib import Path
+from typing import Any
+
+import starlette.requests
+import starlette.responses
+from starlette.routing import Route
+
+from relax.app import (
+    MANIFEST_ROUTES,
+    PATH_FUNCTION_ROUTERS,
+    PATH_FUNCTIONS,
+    App,
+    ParamExtractor,
+)
+from relax.injection import COMPONENT_PLANS, COMPONENTS, ComponentPlan
+
+MANIFEST_VERSION = 1
+# defaults of params that can be stored as is
+JSON_TYPES = (type(None), bool, int, float, str)
+
+
+class ManifestError(Exception): ...
+
+
+def _import_path(obj: Any) -> str | None:
+    module = getattr(obj, "__module__", None)
+    qualname = getattr(obj, "__qualname__", "")
+    # lambdas, local functions and things like `int | None` can't be imported
+    if module is None or not qualname or "<" in qualname:
+        return None
+    return f"{module}:{qualname}"
+
+
+def _resolve(import_path: str) -> Any:
+    module_name, qualname = import_path.split(":")
+    obj: Any = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _dump_extractor(extractor: ParamExtractor) -> dict[str, Any]:
+    entry: dict[str, Any] = {
+        "name": extractor.name,
+        "source": extractor.source,
+        "required": extractor.default is Parameter.empty,
+        "converter": _import_path(extractor.converter),
+    }
+    if not entry["required"]:
+        entry["default"] = extractor.default
+    return entry
+
+
+def _compiled(entries: list[dict[str, Any]]) -> bool:
+    return all(
+        entry["converter"] is not None
+        and (entry["required"] or type(entry["default"]) in JSON_TYPES)
+        for entry in entries
+    )
+
+
+def build_manifest(app: App) -> dict[str, Any]:
+    routes: list[dict[str, Any]] = []
+    for router in app.routers:
+        for route in router.routes:
+            extractors = [
+                _dump_extractor(extractor)
+                for extractor in router.extractors[route.name]
+            ]
+            routes.append(
+                {
+                    "name": route.name,
+                    "path": route.path,
+                    "methods": sorted(route.methods or ()),
+                    "module": router.functions[route.name].__module__,
+                    # params whose converter or default can't be stored are
+                    # compiled again on import
+                    "compiled": _compiled(extractors),
+                    "extractors": [
+                        {**entry, "default": None}
+                        if not entry["required"]
+                        and type(entry["default"]) not in JSON_TYPES
+                        else entry
+                        for entry in extractors
+                    ],
+                },
+            )
+    return {
+        "version": MANIFEST_VERSION,
+        "routes": routes,
+        "components": {
+            component_id: plan._asdict() for component_id, plan in COMPONENTS.items()
+        },
+    }
+
+
+def write_manifest(app: App, path: Path) -> None:
+    path.write_text(json.dumps(build_manifest(app), indent=2) + "\n")
+
+
+def _lazy_endpoint(
+    module: str,
+    path_function_id: str,
+) -> Callable[[starlette.requests.Request], Any]:
+    endpoint: Callable | None = None
+
+    async def lazy(request: starlette.requests.Request) -> starlette.responses.Response:
+        nonlocal endpoint
+        if endpoint is None:
+            importlib.import_module(module)
+            endpoint = PATH_FUNCTIONS[path_function_id]
+        return await endpoint(request)
+
+    return lazy
+
+
+def load_manifest(app: App, path: Path) -> None:
+    manifest = json.loads(path.read_text())
+    if manifest.get("version") != MANIFEST_VERSION:
+        msg = f"{path} is not a version {MANIFEST_VERSION} relax manifest"
+        raise ManifestError(msg)
+
+    for component_id, plan in manifest["components"].items():
+        COMPONENT_PLANS[component_id] = ComponentPlan(
+            plan["takes_id"],
+            tuple(plan["key_params"]),
+        )
+
+    for entry in manifest["routes"]:
+        path_function_id = f"{entry['module']}:{entry['name']}"
+        extractors = [
+            ParamExtractor(
+                extractor["name"],
+                extractor["source"],
+                _resolve(extractor["converter"]) if entry["compiled"] else str,
+                Parameter.empty if extractor["required"] else extractor["default"],
+            )
+            for extractor in entry["extractors"]
+        ]
+        router = PATH_FUNCTION_ROUTERS.get(path_function_id)
+        if entry["module"] in sys.modules and router is not None:
+            # the module was imported before the manifest was loaded, so its
+            # path functions are already registered
+            if router.app is None:
+                router.app = app
+            elif router.app is not app:
+                msg = f"Router of {path_function_id} already added to {router.app}"
+                raise ManifestError(msg)
+        else:
+            MANIFEST_ROUTES[path_function_id] = (
+                app,
+                extractors if entry["compiled"] else None,
+            )
+        app.add_path_route(
+            Route(
+                entry["path"],
+                _lazy_endpoint(entry["module"], path_function_id),
+                methods=entry["methods"],
+                name=entry["name"],
+            ),
+            extractors,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Write the route and component manifest of a relax app.",
+    )
+    parser.add_argument("factory", help="app factory, as module:function")
+    parser.add_argument("output", type=Path)
+    args = parser.parse_args()
+    write_manifest(_resolve(args.factory)(), args.output)
+
+
+if __name__ == "__main__":
+    main()
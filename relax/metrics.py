@@ -0,0 +1,161 @@
+from bisect import bisect_left
+from collections import defaultdict
+from time import perf_counter
+from typing import Any
+
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from relax.broadcast import Broadcaster
+from relax.threads import ThreadPool
+
+# in seconds, the same as the default buckets of the prometheus clients
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RouteMetrics:
+    __slots__ = ("buckets", "count", "statuses", "sum")
+
+    def __init__(self, bucket_count: int) -> None:
+        self.statuses: defaultdict[int, int] = defaultdict(int)
+        # one more than the buckets, for durations above the last bound, and
+        # not cumulative until exported, so a request increments one count
+        self.buckets = [0] * (bucket_count + 1)
+        self.count = 0
+        self.sum = 0.0
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Request counts, status codes and latency histograms per route.
+
+    The counters are plain ints updated from the event loop, so there is no
+    locking, and each worker process has its own. They are exported in the
+    Prometheus text format at `path`.
+    """
+
+    def __init__(
+        self,
+        path: str = "/metrics",
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.path = path
+        self.buckets = tuple(sorted(buckets))
+        self.routes: dict[str, RouteMetrics] = {}
+
+    def _route_metrics(self, route: str) -> RouteMetrics:
+        if (metrics := self.routes.get(route)) is None:
+            metrics = self.routes[route] = RouteMetrics(len(self.buckets))
+        return metrics
+
+    def observe(self, route: str, status_code: int, duration: float) -> None:
+        self._record(self._route_metrics(route), status_code, duration)
+
+    def _record(
+        self,
+        metrics: RouteMetrics,
+        status_code: int,
+        duration: float,
+    ) -> None:
+        metrics.statuses[status_code] += 1
+        metrics.buckets[bisect_left(self.buckets, duration)] += 1
+        metrics.count += 1
+        metrics.sum += duration
+
+    def instrument(self, route: str, app: ASGIApp) -> ASGIApp:
+        metrics = self._route_metrics(route)
+        record = self._record
+
+        async def instrumented(scope: Scope, receive: Receive, send: Send) -> None:
+            start = perf_counter()
+            status_code = 500
+
+            async def send_with_status(message: Message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                await send(message)
+
+            try:
+                await app(scope, receive, send_with_status)
+            except HTTPException as e:
+                status_code = e.status_code
+                raise
+            finally:
+                record(metrics, status_code, perf_counter() - start)
+
+        return instrumented
+
+    def render(
+        self,
+        thread_pool: ThreadPool | None = None,
+        broadcaster: Broadcaster | None = None,
+    ) -> str:
+        lines = [
+            "# HELP relax_requests_total Requests handled, by route and status code.",
+            "# TYPE relax_requests_total counter",
+        ]
+        for route, metrics in self.routes.items():
+            for status_code, count in sorted(metrics.statuses.items()):
+                lines.append(
+                    f'relax_requests_total{{route="{_label(route)}",'
+                    f'status="{status_code}"}} {count}',
+                )
+        lines += [
+            "# HELP relax_request_duration_seconds Request latency, by route.",
+            "# TYPE relax_request_duration_seconds histogram",
+        ]
+        bounds = [*map(str, self.buckets), "+Inf"]
+        for route, metrics in self.routes.items():
+            route_label = f'route="{_label(route)}"'
+            cumulative = 0
+            for bound, count in zip(bounds, metrics.buckets, strict=True):
+                cumulative += count
+                lines.append(
+                    f"relax_request_duration_seconds_bucket"
+                    f'{{{route_label},le="{bound}"}} {cumulative}',
+                )
+            lines.append(
+                f"relax_request_duration_seconds_sum{{{route_label}}} {metrics.sum}",
+            )
+            lines.append(
+                f"relax_request_duration_seconds_count{{{route_label}}} "
+                f"{metrics.count}",
+            )
+        if thread_pool is not None:
+            size, active, queued = thread_pool.stats()
+            lines += [
+                "# TYPE relax_thread_pool_size gauge",
+                f"relax_thread_pool_size {size}",
+                "# TYPE relax_thread_pool_active gauge",
+                f"relax_thread_pool_active {active}",
+                "# TYPE relax_thread_pool_queued gauge",
+                f"relax_thread_pool_queued {queued}",
+            ]
+        if broadcaster is not None:
+            connections, queued, max_queue_depth, dropped = broadcaster.stats()
+            lines += [
+                "# TYPE relax_websocket_connections gauge",
+                f"relax_websocket_connections {connections}",
+                "# TYPE relax_websocket_queued gauge",
+                f"relax_websocket_queued {queued}",
+                "# TYPE relax_websocket_max_queue_depth gauge",
+                f"relax_websocket_max_queue_depth {max_queue_depth}",
+                "# TYPE relax_websocket_dropped_total counter",
+                f"relax_websocket_dropped_total {dropped}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    async def endpoint(self, request: Request) -> PlainTextResponse:
+        thread_pool: Any = getattr(request.app, "thread_pool", None)
+        broadcaster: Any = getattr(request.app, "broadcaster", None)
+        return PlainTextResponse(
+            self.render(thread_pool, broadcaster),
+            media_type=CONTENT_TYPE,
+        )
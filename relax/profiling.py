@@ -0,0 +1,153 @@
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import TYPE_CHECKING, Any
+
+# relax.injection imports this module for `label`, so the rest of what the
+# profiler needs is only imported when it runs
+if TYPE_CHECKING:
+    from starlette.requests import Request
+    from starlette.responses import Response
+
+# code objects of path functions and components, to label their frames with
+LABELS: dict[CodeType, str] = {}
+
+MAX_SECONDS = 60.0
+PSTATS_MEDIA_TYPE = "application/octet-stream"
+
+
+def label(func: Callable, name: str) -> None:
+    if (code := getattr(func, "__code__", None)) is not None:
+        LABELS[code] = name
+
+
+def frame_label(code: CodeType) -> str:
+    if (name := LABELS.get(code)) is not None:
+        return name
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame: FrameType | None) -> str:
+    labels: list[str] = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def sample_stacks(seconds: float, interval: float) -> Counter[str]:
+    stacks: Counter[str] = Counter()
+    sampler = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != sampler:
+                stacks[collapse_stack(frame)] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def _relabel(key: tuple[str, int, str], labels: dict[tuple[str, int, str], str]) -> Any:
+    if (name := labels.get(key)) is None:
+        return key
+    return (key[0], key[1], name)
+
+
+def labeled_pstats(stats: dict) -> dict:
+    # pstats only knows functions by file, line and name, not by code object
+    labels = {
+        (code.co_filename, code.co_firstlineno, code.co_name): name
+        for code, name in LABELS.items()
+    }
+    return {
+        _relabel(key, labels): (
+            *values[:4],
+            {_relabel(caller, labels): calls for caller, calls in values[4].items()},
+        )
+        for key, values in stats.items()
+    }
+
+
+class Profiler:
+    """A debug route profiling the live worker for a number of seconds.
+
+    `GET {path}?seconds=5` samples the stacks of every thread and returns
+    them collapsed (the input format of flamegraph tools), while
+    `format=pstats` runs cProfile on the event loop thread and returns a
+    file for `pstats.Stats`. Frames of path functions and components are
+    labeled `route:<name>` and `component:<name>`.
+
+    The route is only reachable with the given auth scopes.
+    """
+
+    def __init__(
+        self,
+        scopes: Sequence[str],
+        path: str = "/_debug/profile",
+        interval: float = 0.005,
+    ) -> None:
+        if not scopes:
+            msg = "the profiler route must require at least one auth scope"
+            raise ValueError(msg)
+        self.scopes = scopes
+        self.path = path
+        self.interval = interval
+        self._running = False
+
+    async def endpoint(self, request: "Request") -> "Response":
+        from starlette.responses import PlainTextResponse
+
+        try:
+            seconds = min(float(request.query_params.get("seconds", 5)), MAX_SECONDS)
+        except ValueError:
+            return PlainTextResponse("seconds must be a number", status_code=400)
+        output = request.query_params.get("format", "collapsed")
+        if output not in ("collapsed", "pstats"):
+            return PlainTextResponse("unknown format", status_code=400)
+        if self._running:
+            return PlainTextResponse("already profiling", status_code=409)
+        self._running = True
+        try:
+            # without frame sampling (outside CPython), cProfile is all there is
+            if output == "collapsed" and hasattr(sys, "_current_frames"):
+                return await self._sample(seconds)
+            return await self._profile(seconds)
+        finally:
+            self._running = False
+
+    async def _sample(self, seconds: float) -> "Response":
+        import anyio.to_thread
+        from starlette.responses import PlainTextResponse
+
+        stacks = await anyio.to_thread.run_sync(
+            sample_stacks,
+            seconds,
+            self.interval,
+        )
+        return PlainTextResponse(
+            "".join(f"{stack} {count}\n" for stack, count in stacks.most_common()),
+        )
+
+    async def _profile(self, seconds: float) -> "Response":
+        import cProfile
+        import marshal
+
+        import anyio
+        from starlette.responses import Response
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await anyio.sleep(seconds)
+        finally:
+            profile.disable()
+        profile.create_stats()
+        return Response(
+            marshal.dumps(labeled_pstats(profile.stats)),  # type: ignore
+            media_type=PSTATS_MEDIA_TYPE,
+            headers={"Content-Disposition": 'attachment; filename="profile.pstats"'},
+        )
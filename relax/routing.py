@@ -0,0 +1,234 @@
+import re
+from collections.abc import Iterator, Mapping
+from inspect import Parameter
+from typing import Any
+from urllib.parse import quote, urlencode
+
+from starlette.convertors import CONVERTOR_TYPES, Convertor
+from starlette.datastructures import URLPath
+from starlette.exceptions import HTTPException
+from starlette.responses import PlainTextResponse
+from starlette.routing import BaseRoute, Match, NoMatchFound, Route
+from starlette.types import Receive, Scope, Send
+
+PARAM_SEGMENT_REGEX = re.compile(
+    r"^{([a-zA-Z_][a-zA-Z0-9_]*)(:[a-zA-Z_][a-zA-Z0-9_]*)?}$",
+)
+PATH_FORMAT_PARAM_REGEX = re.compile(r"{([a-zA-Z_][a-zA-Z0-9_]*)}")
+MATCHED_ROUTE_KEY = "relax.matched_route"
+
+
+class _Node:
+    def __init__(self) -> None:
+        self.static: dict[str, _Node] = {}
+        self.params: list[tuple[str, Convertor, re.Pattern[str], _Node]] = []
+        # a trailing `{name:path}` segment, which swallows the rest of the path
+        self.catch_all: tuple[str, Convertor, re.Pattern[str], _Node] | None = None
+        self.routes: list[Route] = []
+        self.methods: set[str] = set()
+
+    def param_child(self, name: str, convertor: Convertor) -> "_Node":
+        for param_name, param_convertor, _, node in self.params:
+            if param_name == name and param_convertor is convertor:
+                return node
+        node = _Node()
+        self.params.append((name, convertor, re.compile(convertor.regex), node))
+        return node
+
+
+def _parse_segment(segment: str) -> tuple[str, Convertor] | None:
+    if (match := PARAM_SEGMENT_REGEX.match(segment)) is None:
+        return None
+    name, convertor_type = match.groups("str")
+    return name, CONVERTOR_TYPES[convertor_type.lstrip(":")]
+
+
+class RouteTree(BaseRoute):
+    """Matches routes segment by segment instead of trying each route's regex.
+
+    Static segments take precedence over path params, and routes whose
+    segments mix static text and params are matched linearly as a fallback.
+    """
+
+    def __init__(self, routes: list[Route] | None = None) -> None:
+        self.root = _Node()
+        self.fallback: list[Route] = []
+        self.names: dict[str, Route] = {}
+        for route in routes or []:
+            self.add(route)
+
+    def add(self, route: Route) -> None:
+        self.names.setdefault(route.name, route)
+        node = self.root
+        segments = route.path[1:].split("/")
+        for idx, segment in enumerate(segments):
+            if "{" not in segment:
+                node = node.static.setdefault(segment, _Node())
+                continue
+            if (parsed := _parse_segment(segment)) is None:
+                self.fallback.append(route)
+                return
+            name, convertor = parsed
+            if convertor is CONVERTOR_TYPES["path"]:
+                if idx != len(segments) - 1:
+                    self.fallback.append(route)
+                    return
+                if node.catch_all is None:
+                    node.catch_all = (name, convertor, re.compile(".*"), _Node())
+                node = node.catch_all[3]
+            else:
+                node = node.param_child(name, convertor)
+        node.routes.append(route)
+        node.methods |= route.methods or set()
+
+    def _lookup(
+        self,
+        node: _Node,
+        segments: list[str],
+        idx: int,
+        params: dict[str, Any],
+    ) -> Iterator[tuple[_Node, dict[str, Any]]]:
+        # every node with routes for the path, static segments first; lazily,
+        # since the first one usually has a route for the method
+        if idx == len(segments):
+            if node.routes:
+                yield node, params
+            return
+        segment = segments[idx]
+        if (child := node.static.get(segment)) is not None:
+            yield from self._lookup(child, segments, idx + 1, params)
+        for name, convertor, regex, child in node.params:
+            if regex.fullmatch(segment):
+                yield from self._lookup(
+                    child,
+                    segments,
+                    idx + 1,
+                    {**params, name: convertor.convert(segment)},
+                )
+        if node.catch_all is not None:
+            name, convertor, _, child = node.catch_all
+            if child.routes:
+                rest = "/".join(segments[idx:])
+                yield child, {**params, name: convertor.convert(rest)}
+
+    def matches(self, scope: Scope) -> tuple[Match, Scope]:
+        if scope["type"] != "http":
+            return Match.NONE, {}
+        segments = scope["path"][1:].split("/")
+        # like Starlette, a route matching the path but not the method only
+        # makes a 405 once no other route matches both
+        partial: tuple[_Node, dict[str, Any]] | None = None
+        for node, matched_params in self._lookup(self.root, segments, 0, {}):
+            for route in node.routes:
+                if not route.methods or scope["method"] in route.methods:
+                    return Match.FULL, {
+                        "endpoint": route.endpoint,
+                        "path_params": self._path_params(scope, matched_params),
+                        MATCHED_ROUTE_KEY: route,
+                    }
+            if partial is None:
+                partial = node, matched_params
+        if partial is None:
+            return self._matches_fallback(scope)
+        if self.fallback and (fallback := self._matches_fallback(scope))[0] == (
+            Match.FULL
+        ):
+            return fallback
+        node, matched_params = partial
+        return Match.PARTIAL, {
+            "endpoint": node.routes[0].endpoint,
+            "path_params": self._path_params(scope, matched_params),
+            MATCHED_ROUTE_KEY: node,
+        }
+
+    def _path_params(
+        self,
+        scope: Scope,
+        matched_params: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {**scope.get("path_params", {}), **matched_params}
+
+    def _matches_fallback(self, scope: Scope) -> tuple[Match, Scope]:
+        partial: tuple[Match, Scope] | None = None
+        for route in self.fallback:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                return match, {**child_scope, MATCHED_ROUTE_KEY: route}
+            if match == Match.PARTIAL and partial is None:
+                partial = match, {**child_scope, MATCHED_ROUTE_KEY: route}
+        return partial or (Match.NONE, {})
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        matched = scope[MATCHED_ROUTE_KEY]
+        if isinstance(matched, Route):
+            await matched.handle(scope, receive, send)
+            return
+        headers = {"Allow": ", ".join(sorted(matched.methods))}
+        if "app" in scope:
+            raise HTTPException(status_code=405, headers=headers)
+        response = PlainTextResponse(
+            "Method Not Allowed",
+            status_code=405,
+            headers=headers,
+        )
+        await response(scope, receive, send)
+
+    def url_path_for(self, name: str, /, **path_params: Any) -> URLPath:
+        if (route := self.names.get(name)) is None:
+            raise NoMatchFound(name, path_params)
+        return route.url_path_for(name, **path_params)
+
+
+class URLBuilder:
+    """Builds URLs for a route from a path format split once, ahead of time.
+
+    Path params and query params are percent-encoded. Query params are given
+    as a mapping of name to default value; params without a default
+    (`Parameter.empty`) are required.
+    """
+
+    def __init__(
+        self,
+        route: Route,
+        query_params: Mapping[str, Any] | None = None,
+    ) -> None:
+        self.name = route.name
+        pieces = PATH_FORMAT_PARAM_REGEX.split(route.path_format)
+        self.literals: list[str] = pieces[0::2]
+        self.path_params: list[tuple[str, Convertor, str]] = [
+            (
+                name,
+                route.param_convertors[name],
+                # only `{name:path}` params may contain slashes
+                "/" if route.param_convertors[name] is CONVERTOR_TYPES["path"] else "",
+            )
+            for name in pieces[1::2]
+        ]
+        self.query_params = dict(query_params or {})
+
+    def __call__(self, **kwargs: Any) -> URLPath:
+        parts = [self.literals[0]]
+        for (name, convertor, safe), literal in zip(
+            self.path_params,
+            self.literals[1:],
+            strict=True,
+        ):
+            if name not in kwargs:
+                raise NoMatchFound(self.name, kwargs)
+            parts.append(quote(convertor.to_string(kwargs.pop(name)), safe=safe))
+            parts.append(literal)
+        query: list[tuple[str, str]] = []
+        for name, default in self.query_params.items():
+            if name not in kwargs:
+                if default is Parameter.empty:
+                    msg = f"missing query parameter {name} for {self.name}"
+                    raise ValueError(msg)
+                continue
+            if (value := kwargs.pop(name)) is not None:
+                query.append((name, str(value)))
+        if kwargs:
+            raise NoMatchFound(self.name, kwargs)
+        if query:
+            parts.append("?")
+            parts.append(urlencode(query))
+        return URLPath(path="".join(parts), protocol="http")
@@ -1,20 +1,83 @@
-import contextlib
-import time
-from socket import AF_UNIX, SOCK_STREAM, socket
+from fnmatch import fnmatch
+from socket import socket
+from time import monotonic
 import uvicorn.config
 from uvicorn.supervisors.watchfilesreload import WatchFilesReload
 import uvicorn
-import json
 from pathlib import Path
+from watchfiles import watch
 
 from relax.config import BaseConfig
+from relax.ipc import ReloadChannel
 
 
 from typing import (
     Callable,
+    Literal,
+    Sequence,
 )
 
-MAX_CONNECT_RETRIES = 5
+ChangeKind = Literal["template", "app", "ignored"]
+
+DEFAULT_RELOAD_INCLUDES = ("*.py",)
+# hidden files and dirs (like .git), editor swap and backup files, bytecode
+DEFAULT_RELOAD_EXCLUDES = (
+    ".*",
+    "*~",
+    "#*#",
+    "*.sw?",
+    "*.py[cod]",
+    "__pycache__",
+)
+# seconds without changes before a burst of them is handled
+DEFAULT_RELOAD_DEBOUNCE = 0.1
+MAX_CLASSIFIED_PATHS = 10_000
+
+
+class ChangeClassifier:
+    """Tells changed templates, which are replaced in the running app, from
+    other changed app files, which restart it, and from ignored files.
+
+    Files are watched when their name matches an include glob, and ignored
+    when any part of their path below `root` matches an exclude glob. Paths
+    are classified once, since a checkout or a formatter touches the same
+    files many times.
+    """
+
+    def __init__(
+        self,
+        templates_dir: Path,
+        includes: Sequence[str] = DEFAULT_RELOAD_INCLUDES,
+        excludes: Sequence[str] = DEFAULT_RELOAD_EXCLUDES,
+        root: Path | None = None,
+    ) -> None:
+        self.templates_dir = templates_dir
+        self.root = root if root is not None else Path.cwd()
+        self.includes = tuple(includes)
+        self.excludes = tuple(excludes)
+        self._kinds: dict[Path, ChangeKind] = {}
+
+    def __call__(self, path: Path) -> ChangeKind:
+        if (kind := self._kinds.get(path)) is None:
+            if len(self._kinds) >= MAX_CLASSIFIED_PATHS:
+                self._kinds.clear()
+            kind = self._kinds[path] = self._classify(path)
+        return kind
+
+    def _classify(self, path: Path) -> ChangeKind:
+        if not any(fnmatch(path.name, pattern) for pattern in self.includes):
+            return "ignored"
+        # the dirs above the project, like a hidden home dir, don't count
+        parts = (
+            path.relative_to(self.root).parts
+            if path.is_relative_to(self.root)
+            else (path.name,)
+        )
+        if any(fnmatch(part, pattern) for part in parts for pattern in self.excludes):
+            return "ignored"
+        if path.is_relative_to(self.templates_dir):
+            return "template"
+        return "app"
 
 
 class RelaxReload(WatchFilesReload):
@@ -26,75 +89,85 @@ class RelaxReload(WatchFilesReload):
         target: Callable[[list[socket] | None], None],
         sockets: list[socket],
         base_config: BaseConfig,
+        *,
+        reload_includes: Sequence[str] = DEFAULT_RELOAD_INCLUDES,
+        reload_excludes: Sequence[str] = DEFAULT_RELOAD_EXCLUDES,
+        reload_debounce: float = DEFAULT_RELOAD_DEBOUNCE,
     ) -> None:
         super().__init__(config, target, sockets)
         self.base_config = base_config
-        self._reload_socket: socket | None = None
+        self.reload_channel = ReloadChannel(base_config.RELOAD_SOCKET_PATH)
+        self.classify = ChangeClassifier(
+            base_config.TEMPLATES_DIR,
+            reload_includes,
+            reload_excludes,
+        )
+        self.reload_debounce = reload_debounce
+        # wake up once the debounce window passed without changes, instead of
+        # after watchfiles' default of 5 seconds
+        self.watcher = watch(
+            *self.reload_dirs,
+            watch_filter=None,
+            stop_event=self.should_exit,
+            yield_on_timeout=True,
+            rust_timeout=max(int(reload_debounce * 1000), 1),
+        )
+        # changes waiting for the debounce window to pass, in order
+        self.changed_templates: dict[Path, None] = {}
+        self.changed_app_files: dict[Path, None] = {}
+        self._last_change = 0.0
 
     def should_restart(self) -> list[Path] | None:
         try:
-            changed_paths = super().should_restart()
-            if changed_paths is None:
+            self.pause()
+            changes = next(self.watcher)
+            for _, str_path in changes:
+                path = Path(str_path)
+                kind = self.classify(path)
+                if kind == "template":
+                    self.changed_templates[path.relative_to(Path.cwd())] = None
+                elif kind == "app":
+                    self.changed_app_files[path] = None
+                if kind != "ignored":
+                    self._last_change = monotonic()
+            if not self.changed_templates and not self.changed_app_files:
+                # changes made while the app was starting are sent once it's up
+                pending = [Path(path) for path in self.reload_channel.pending]
+                if self.reload_channel.flush():
+                    return pending
+                return None
+            # bursts of changes, like from a checkout, are handled at once
+            if monotonic() - self._last_change < self.reload_debounce:
                 return None
-            changed_templates: list[Path] = []
-            changed_app_files: list[Path] = []
-            for change in changed_paths:
-                try:
-                    Path(change).relative_to(self.base_config.TEMPLATES_DIR)
-                    changed_templates.append(Path(change).relative_to(Path.cwd()))
-                # we raise ValueError if the path is not in the templates dir
-                except ValueError:
-                    changed_app_files.append(change)
+            changed_templates = list(self.changed_templates)
+            changed_app_files = list(self.changed_app_files)
+            self.changed_templates.clear()
+            self.changed_app_files.clear()
             if len(changed_app_files) > 0:
                 print("changed app files: ", changed_app_files)
+                # the restarted app loads the changed templates anyway
+                self.reload_channel.pending.clear()
                 return changed_app_files
-            if len(changed_templates) > 0:
-                print("changed templates: ", changed_templates)
-                self._update_templates(changed_templates)
+            print("changed templates: ", changed_templates)
+            if self._update_templates(changed_templates):
+                print("templates can't be replaced, restarting")
+                return changed_templates
         except Exception as e:
             print("failed to check for restart: %s" % e)
             raise
         return None
 
     def shutdown(self) -> None:
-        if self.reload_socket is not None:
-            self.reload_socket.close()
+        self.reload_channel.close()
         return super().shutdown()
 
     def run(self) -> None:
         return super().run()
 
-    def get_new_reload_socket(self, retries: int = 0) -> socket:
-        self.reload_socket = socket(AF_UNIX, SOCK_STREAM)
-        self.reload_socket.settimeout(5)
-        if self.base_config.RELOAD_SOCKET_PATH.parent.exists():
-            self.base_config.RELOAD_SOCKET_PATH.parent.mkdir(
-                parents=True, exist_ok=True
-            )
-        try:
-            self.reload_socket.connect(str(self.base_config.RELOAD_SOCKET_PATH))
-        except ConnectionRefusedError:
-            if retries >= MAX_CONNECT_RETRIES:
-                raise
-            time.sleep(1)
-            return self.get_new_reload_socket(retries + 1)
-        return self.reload_socket
-
-    def _update_templates(self, changed_templates: list[Path]) -> None:
-        try:
-            if self._reload_socket is None:
-                self.get_new_reload_socket()
-        except ConnectionRefusedError:
-            print("can't connect to reload socket, not updating templates")
-            return
-        changes = json.dumps(
-            {
-                "event_type": "update_views",
-                "data": [str(change) for change in changed_templates],
-            },
-        ).encode()
-        self.reload_socket.send(changes)
-        self.reload_socket.close()
+    def _update_templates(self, changed_templates: list[Path]) -> bool:
+        return self.reload_channel.update_views(
+            str(change) for change in changed_templates
+        )
 
 
 def start_app(
@@ -105,6 +178,9 @@ def start_app(
     port: int | None = None,
     reload: bool = False,
     log_level: str = "info",
+    reload_includes: Sequence[str] = DEFAULT_RELOAD_INCLUDES,
+    reload_excludes: Sequence[str] = DEFAULT_RELOAD_EXCLUDES,
+    reload_debounce: float = DEFAULT_RELOAD_DEBOUNCE,
 ) -> None:
     if port is None:
         port = config.PORT
@@ -134,6 +210,9 @@ def start_app(
             target=server.run,
             sockets=[sock],
             base_config=config,
+            reload_includes=reload_includes,
+            reload_excludes=reload_excludes,
+            reload_debounce=reload_debounce,
         )
         reloader.run()
     else:
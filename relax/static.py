@@ -0,0 +1,204 @@
+"""
+Static assets with content-hashed names, served with immutable caching.
+
+At build time, every file of a source directory is copied with a hash of its
+content in its name, along with a gzipped version when that's smaller, and a
+manifest mapping logical names to hashed ones:
+```
+python -m relax.static static/ build/static/
+```
+The app serves the build directory, and templates refer to assets by their
+logical name, `link.asset("css/main.css")` or `script.asset("js/app.js")`.
+Browsers can cache the hashed files forever, since a new version gets a new
+name. Without a manifest, like in development, files are served as they are,
+under their logical name, and browsers revalidate them.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from mimetypes import guess_type
+from pathlib import Path
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+MANIFEST_NAME = "assets.json"
+HASH_LENGTH = 12
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# text formats that compress well, others are usually compressed already
+COMPRESSIBLE = frozenset(
+    (".css", ".js", ".mjs", ".json", ".map", ".svg", ".html", ".txt", ".xml"),
+)
+# smaller files fit in a packet either way
+COMPRESS_MIN_SIZE = 256
+
+# URLs of assets by logical name, for every served directory
+ASSET_URLS: dict[str, str] = {}
+
+
+class AssetNotFoundError(Exception): ...
+
+
+def fingerprinted_name(name: str, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    path = Path(name)
+    return path.with_name(f"{path.stem}.{digest}{path.suffix}").as_posix()
+
+
+def build_assets(source: Path, output: Path) -> dict[str, str]:
+    names: dict[str, str] = {}
+    for file in sorted(source.rglob("*")):
+        if not file.is_file():
+            continue
+        name = file.relative_to(source).as_posix()
+        data = file.read_bytes()
+        names[name] = fingerprinted_name(name, data)
+        target = output / names[name]
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        if file.suffix in COMPRESSIBLE and len(data) >= COMPRESS_MIN_SIZE:
+            # without a timestamp, the same content always compresses the same
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                target.with_name(f"{target.name}.gz").write_bytes(compressed)
+    output.mkdir(parents=True, exist_ok=True)
+    (output / MANIFEST_NAME).write_text(json.dumps(names, indent=2) + "\n")
+    return names
+
+
+def asset_url(name: str) -> str:
+    if (url := ASSET_URLS.get(name)) is None:
+        msg = f"no static asset named {name}"
+        raise AssetNotFoundError(msg)
+    return url
+
+
+class StaticAssets:
+    """Serves a directory of assets at `path`, built by `build_assets` or not."""
+
+    def __init__(self, directory: Path, path: str = "/static") -> None:
+        self.directory = directory.resolve()
+        self.path = path.rstrip("/")
+        manifest = self.directory / MANIFEST_NAME
+        self.fingerprinted = manifest.exists()
+        if self.fingerprinted:
+            names: dict[str, str] = json.loads(manifest.read_text())
+        else:
+            names = {}
+            for file in self.directory.rglob("*"):
+                if file.is_file():
+                    name = file.relative_to(self.directory).as_posix()
+                    names[name] = name
+        self.names = names
+        # only files listed in the manifest are served, and they never change
+        self._hashed = set(names.values())
+        self._stats: dict[Path, os.stat_result | None] = {}
+        ASSET_URLS.update({name: f"{self.path}/{file}" for name, file in names.items()})
+
+    def url(self, name: str) -> str:
+        return f"{self.path}/{self.names[name]}"
+
+    def _stat(self, path: Path) -> os.stat_result | None:
+        # hashed files don't change, so they're only looked up once
+        if self.fingerprinted and path in self._stats:
+            return self._stats[path]
+        try:
+            stat_result: os.stat_result | None = path.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            stat_result = None
+        if self.fingerprinted:
+            self._stats[path] = stat_result
+        return stat_result
+
+    async def endpoint(self, request: Request) -> Response:
+        name: str = request.path_params["name"]
+        if self.fingerprinted:
+            if name not in self._hashed:
+                return Response(status_code=404)
+            headers = {"cache-control": IMMUTABLE}
+        else:
+            headers = {"cache-control": REVALIDATE}
+        path = (self.directory / name).resolve()
+        if not path.is_relative_to(self.directory):
+            return Response(status_code=404)
+
+        compressed = path.with_name(f"{path.name}.gz")
+        served, stat_result = path, self._stat(path)
+        etag = f'"{name}"'
+        if (compressed_stat := self._stat(compressed)) is not None:
+            headers["vary"] = "Accept-Encoding"
+            if "gzip" in request.headers.get("accept-encoding", ""):
+                headers["content-encoding"] = "gzip"
+                served, stat_result = compressed, compressed_stat
+                # both encodings are different bytes, so they can't share a
+                # strong etag
+                etag = f'"{name}-gz"'
+        if self.fingerprinted:
+            headers["etag"] = etag
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers=headers)
+        if stat_result is None:
+            return Response(status_code=404)
+        return SendfileResponse(
+            served,
+            headers=headers,
+            # the type of the original file, not of its gzipped version
+            media_type=_media_type(path),
+            stat_result=stat_result,
+            method=request.method,
+        )
+
+
+def _media_type(path: Path) -> str:
+    return guess_type(path.name)[0] or "application/octet-stream"
+
+
+class SendfileResponse(FileResponse):
+    """A file response handing the file to the server, to send it without
+    copying it through Python, when the server supports the ASGI zero-copy
+    send extension."""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            "http.response.zerocopysend" not in scope.get("extensions", {})
+            or self.send_header_only
+            or self.stat_result is None
+        ):
+            await super().__call__(scope, receive, send)
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            },
+        )
+        # opening doesn't read anything, the server reads the file later
+        with Path(self.path).open("rb") as file:
+            await send(
+                {
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "count": self.stat_result.st_size,
+                    "more_body": False,
+                },
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build fingerprinted and precompressed static assets.",
+    )
+    parser.add_argument("source", type=Path)
+    parser.add_argument("output", type=Path)
+    args = parser.parse_args()
+    build_assets(args.source, args.output)
+
+
+if __name__ == "__main__":
+    main()
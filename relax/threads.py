@@ -0,0 +1,57 @@
+from collections.abc import Callable
+from functools import partial
+from typing import NamedTuple, ParamSpec, TypeVar
+
+import anyio
+import anyio.to_thread
+
+_P = ParamSpec("_P")
+_T = TypeVar("_T")
+
+# same as anyio's default thread limiter
+DEFAULT_POOL_SIZE = 40
+
+
+class PoolStats(NamedTuple):
+    size: int
+    active: int
+    queued: int
+
+
+class ThreadPool:
+    """Runs blocking calls in worker threads, at most `size` of them at once.
+
+    Calls made while every thread is busy wait in a queue for one to be free,
+    `stats` reports how many are running and how many are waiting.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE) -> None:
+        self.limiter = anyio.CapacityLimiter(size)
+
+    @property
+    def size(self) -> int:
+        return int(self.limiter.total_tokens)
+
+    @size.setter
+    def size(self, value: int) -> None:
+        self.limiter.total_tokens = value
+
+    async def run(
+        self,
+        func: Callable[_P, _T],
+        *args: _P.args,
+        **kwargs: _P.kwargs,
+    ) -> _T:
+        # context variables (like the current container) are copied to the thread
+        return await anyio.to_thread.run_sync(
+            partial(func, *args, **kwargs),
+            limiter=self.limiter,
+        )
+
+    def stats(self) -> PoolStats:
+        statistics = self.limiter.statistics()
+        return PoolStats(
+            size=int(statistics.total_tokens),
+            active=statistics.borrowed_tokens,
+            queued=statistics.tasks_waiting,
+        )
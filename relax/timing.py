@@ -0,0 +1,104 @@
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+# components measure themselves, so this is imported by relax.injection
+if TYPE_CHECKING:
+    from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PHASES = ("extract", "inject", "handler", "component", "render", "send")
+
+
+class Timings:
+    """Time spent in each phase of a request, in seconds.
+
+    Phases can overlap (components run and elements render during the
+    handler), but a phase nested in itself, like a component calling another
+    one, is only counted once.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self._active: set[str] = set()
+
+    def add(self, phase: str, duration: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        if phase in self._active:
+            yield
+            return
+        self._active.add(phase)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, perf_counter() - start)
+            self._active.discard(phase)
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f"{phase};dur={duration * 1000:.3f}"
+            for phase, duration in self.phases.items()
+        )
+
+
+TimingHook = Callable[[str, Timings], None]
+
+_TIMINGS: ContextVar[Timings | None] = ContextVar("relax_timings", default=None)
+
+
+def current_timings() -> Timings | None:
+    return _TIMINGS.get()
+
+
+@contextmanager
+def measure(phase: str) -> Iterator[None]:
+    # a no-op for requests that aren't timed
+    if (timings := _TIMINGS.get()) is None:
+        yield
+        return
+    with timings.measure(phase):
+        yield
+
+
+def instrument(
+    route: str,
+    app: "ASGIApp",
+    hooks: Sequence[TimingHook],
+    *,
+    server_timing: bool,
+) -> "ASGIApp":
+    async def timed(scope: "Scope", receive: "Receive", send: "Send") -> None:
+        timings = Timings()
+        token = _TIMINGS.set(timings)
+        send_start: float | None = None
+
+        async def timed_send(message: "Message") -> None:
+            nonlocal send_start
+            if message["type"] == "http.response.start":
+                send_start = perf_counter()
+                if server_timing:
+                    # sending isn't done yet, so it's only reported to hooks
+                    message = {
+                        **message,
+                        "headers": [
+                            *message.get("headers", []),
+                            (b"server-timing", timings.server_timing().encode()),
+                        ],
+                    }
+            await send(message)
+
+        try:
+            await app(scope, receive, timed_send)
+        finally:
+            if send_start is not None:
+                timings.add("send", perf_counter() - send_start)
+            _TIMINGS.reset(token)
+            for hook in hooks:
+                hook(route, timings)
+
+    return timed
@@ -0,0 +1,15 @@
+from pathlib import Path
+from typing import Any
+
+from relax.app import App, Router
+from relax.config import BaseConfig
+
+
+def make_app(router: Router | None = None, **kwargs: Any) -> App:
+    app = App(config=BaseConfig(TEMPLATES_DIR=Path(), ENV="TEST"), **kwargs)
+    if router is not None:
+        # routers are declared once per test module, but each test makes its
+        # own app
+        router.app = None
+        app.add_router(router)
+    return app
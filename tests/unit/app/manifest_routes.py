@@ -0,0 +1,20 @@
+# only imported by test_manifest, which checks when that happens
+from relax.app import HTMLResponse, PathStr, QueryInt, Request, Router
+from relax.html import Element, div
+from relax.injection import component
+
+router = Router()
+
+
+@component(key=lambda name: name)
+def greeting(name: str, times: int) -> Element:
+    return div(text=" ".join([f"hi {name}"] * times))
+
+
+@router.path_function("GET", "/greet/{name}")
+async def greet(
+    request: Request,  # noqa: ARG001
+    name: PathStr,
+    times: QueryInt = 1,
+) -> HTMLResponse:
+    return HTMLResponse(greeting(name=name, times=times))
@@ -0,0 +1,122 @@
+import pytest
+from starlette.authentication import (
+    AuthCredentials,
+    AuthenticationBackend,
+    AuthenticationError,
+    SimpleUser,
+)
+from starlette.requests import HTTPConnection
+from starlette.responses import PlainTextResponse
+from starlette.testclient import TestClient
+
+import relax.auth
+from relax.app import AuthScope, Request, Router
+from relax.auth import CachedAuthBackend
+from tests.unit.app.conftest import make_app
+from tests.unit.conftest import Clock
+
+router = Router()
+
+
+class SessionBackend(AuthenticationBackend):
+    def __init__(self) -> None:
+        self.lookups: list[str | None] = []
+
+    async def authenticate(
+        self,
+        conn: HTTPConnection,
+    ) -> tuple[AuthCredentials, SimpleUser] | None:
+        session = conn.cookies.get("session")
+        self.lookups.append(session)
+        if session is None:
+            return None
+        if session == "broken":
+            msg = "invalid session"
+            raise AuthenticationError(msg)
+        return AuthCredentials([AuthScope.Authenticated]), SimpleUser(session)
+
+
+@router.path_function("GET", "/public")
+async def public(request: Request) -> PlainTextResponse:  # noqa: ARG001
+    return PlainTextResponse("public")
+
+
+@router.path_function("GET", "/private", [AuthScope.Authenticated])
+async def private(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(request.user.username)
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(relax.auth, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture()
+def sessions() -> SessionBackend:
+    return SessionBackend()
+
+
+@pytest.fixture()
+def auth(sessions: SessionBackend) -> CachedAuthBackend:
+    return CachedAuthBackend(sessions, ttl=60)
+
+
+@pytest.fixture()
+def client(auth: CachedAuthBackend) -> TestClient:
+    return TestClient(make_app(router, auth_backend=auth))
+
+
+def test_public_route_does_not_authenticate(
+    client: TestClient,
+    sessions: SessionBackend,
+):
+    client.cookies["session"] = "alice"
+    assert client.get("/public").text == "public"
+    assert sessions.lookups == []
+
+
+def test_user_lookup_is_cached(client: TestClient, sessions: SessionBackend):
+    client.cookies["session"] = "alice"
+    assert client.get("/private").text == "alice"
+    assert client.get("/private").text == "alice"
+    assert sessions.lookups == ["alice"]
+
+
+def test_cache_entries_expire(
+    client: TestClient,
+    sessions: SessionBackend,
+    clock: Clock,
+):
+    client.cookies["session"] = "alice"
+    client.get("/private")
+    clock.now = 61
+    client.get("/private")
+    assert sessions.lookups == ["alice", "alice"]
+
+
+def test_invalidate(
+    client: TestClient,
+    sessions: SessionBackend,
+    auth: CachedAuthBackend,
+):
+    client.cookies["session"] = "alice"
+    client.get("/private")
+    auth.invalidate("session=alice")
+    client.get("/private")
+    assert sessions.lookups == ["alice", "alice"]
+
+
+def test_unauthenticated_request_is_forbidden(client: TestClient):
+    assert client.get("/private").status_code == 403
+
+
+def test_authentication_error_is_not_cached(
+    client: TestClient,
+    sessions: SessionBackend,
+):
+    client.cookies["session"] = "broken"
+    assert client.get("/private").status_code == 400
+    assert client.get("/private").status_code == 400
+    assert sessions.lookups == ["broken", "broken"]
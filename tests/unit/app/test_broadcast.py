@@ -0,0 +1,149 @@
+import asyncio
+import json
+
+from relax.broadcast import Broadcaster, BroadcastStats
+from relax.metrics import Metrics
+
+
+class FakeClient:
+    def __init__(self, *, blocked: bool = False, broken: bool = False) -> None:
+        self.messages: list[str] = []
+        self.blocked = blocked
+        self.broken = broken
+        self.closed = False
+
+    async def send_text(self, data: str) -> None:
+        if self.broken:
+            msg = "connection lost"
+            raise RuntimeError(msg)
+        if self.blocked:
+            await asyncio.Event().wait()
+        self.messages.append(data)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def test_messages_reach_every_client():
+    clients = [FakeClient(), FakeClient()]
+
+    async def run() -> None:
+        broadcaster = Broadcaster()
+        for client in clients:
+            broadcaster.connect(client)  # type: ignore
+        broadcaster.publish({"event_type": "update_views", "data": {"a": "<p></p>"}})
+        await broadcaster.drain()
+
+    asyncio.run(run())
+    for client in clients:
+        assert [json.loads(message) for message in client.messages] == [
+            {"event_type": "update_views", "data": {"a": "<p></p>"}},
+        ]
+
+
+def test_clients_falling_behind_are_dropped():
+    fast, slow = FakeClient(), FakeClient(blocked=True)
+
+    async def run() -> BroadcastStats:
+        broadcaster = Broadcaster(queue_size=1)
+        broadcaster.connect(fast)  # type: ignore
+        broadcaster.connect(slow)  # type: ignore
+        broadcaster.publish(1)
+        # the slow client is stuck sending the first message
+        await asyncio.sleep(0.01)
+        broadcaster.publish(2)
+        await asyncio.sleep(0.01)
+        assert broadcaster.stats() == BroadcastStats(
+            connections=2,
+            queued=1,
+            max_queue_depth=1,
+            dropped=0,
+        )
+        broadcaster.publish(3)
+        await broadcaster.drain()
+        await asyncio.sleep(0)
+        return broadcaster.stats()
+
+    stats = asyncio.run(run())
+    assert stats == BroadcastStats(
+        connections=1,
+        queued=0,
+        max_queue_depth=0,
+        dropped=1,
+    )
+    assert fast.messages == ["1", "2", "3"]
+    assert slow.closed
+
+
+def test_clients_failing_to_receive_are_dropped():
+    broken = FakeClient(broken=True)
+
+    async def run() -> Broadcaster:
+        broadcaster = Broadcaster()
+        broadcaster.connect(broken)  # type: ignore
+        broadcaster.publish(1)
+        broadcaster.publish(2)
+        await broadcaster.drain()
+        return broadcaster
+
+    broadcaster = asyncio.run(run())
+    assert broadcaster.clients == {}
+    assert broadcaster.dropped == 1
+
+
+def test_metrics_report_websocket_stats():
+    broadcaster = Broadcaster()
+    broadcaster.dropped = 2
+    text = Metrics().render(broadcaster=broadcaster)
+    assert "relax_websocket_connections 0\n" in text
+    assert "relax_websocket_max_queue_depth 0\n" in text
+    assert "relax_websocket_dropped_total 2\n" in text
+
+
+def test_clients_only_get_the_views_they_show():
+    everything, page, other = FakeClient(), FakeClient(), FakeClient()
+    views = {"a": "<p>a</p>", "b": "<p>b</p>"}
+
+    async def run() -> None:
+        broadcaster = Broadcaster()
+        for client in (everything, page, other):
+            broadcaster.connect(client)  # type: ignore
+        broadcaster.clients[page].mounted = {"b", "c"}  # type: ignore
+        broadcaster.clients[other].mounted = {"c"}  # type: ignore
+        broadcaster.publish_views(views)
+        await broadcaster.drain()
+
+    asyncio.run(run())
+    assert json.loads(everything.messages[0])["data"] == views
+    assert json.loads(page.messages[0])["data"] == {"b": "<p>b</p>"}
+    assert other.messages == []
+
+
+class FakeSocket(FakeClient):
+    def __init__(self, *received: str) -> None:
+        super().__init__()
+        self.received = list(received)
+
+    async def accept(self) -> None: ...
+
+    async def receive_text(self) -> str:
+        if self.received:
+            return self.received.pop(0)
+        await asyncio.Event().wait()
+        raise AssertionError
+
+
+def test_clients_report_the_elements_they_show():
+    mounted = json.dumps({"event_type": "mounted", "data": ["a", "b"]})
+
+    async def run() -> set[str] | None:
+        broadcaster = Broadcaster()
+        serving = asyncio.create_task(
+            broadcaster.serve(FakeSocket(mounted, "not json")),  # type: ignore
+        )
+        await asyncio.sleep(0)
+        ids = broadcaster.mounted_ids()
+        serving.cancel()
+        return ids
+
+    assert asyncio.run(run()) == {"a", "b"}
@@ -0,0 +1,120 @@
+import asyncio
+from collections.abc import Iterator
+
+import pytest
+from starlette.testclient import TestClient
+
+from relax import cache as relax_cache
+from relax.app import AuthScope, HTMLResponse, QueryStr, Request, Router
+from relax.cache import CachedResponse, InMemoryCacheBackend, RouteCache
+from relax.html import div
+from tests.unit.app.conftest import make_app
+from tests.unit.conftest import Clock
+
+router = Router()
+page_cache = RouteCache(ttl=10, stale_while_revalidate=10)
+calls: list[str] = []
+
+
+@router.path_function("GET", "/page", cache=page_cache)
+async def cached_page(request: Request, q: QueryStr = "") -> HTMLResponse:
+    calls.append(q)
+    variant = "partial" if request.scope["from_htmx"] else "full"
+    return HTMLResponse(div(text=f"{variant} {q} {len(calls)}"))
+
+
+@router.path_function("GET", "/visit", cache=page_cache)
+async def visit(request: Request) -> HTMLResponse:  # noqa: ARG001
+    calls.append("visit")
+    response = HTMLResponse(div(text="welcome"))
+    response.set_cookie("session", f"visitor-{len(calls)}")
+    return response
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock(1000.0)
+    monkeypatch.setattr(relax_cache, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture()
+def client() -> Iterator[TestClient]:
+    calls.clear()
+    with TestClient(make_app(router)) as client:
+        yield client
+    asyncio.run(page_cache.invalidate())
+
+
+@pytest.mark.usefixtures(clock.__name__)
+def test_cached_response_skips_handler(client: TestClient):
+    assert client.get("/page").text == "<div>full  1</div>"
+    assert client.get("/page").text == "<div>full  1</div>"
+    assert calls == [""]
+
+
+@pytest.mark.usefixtures(clock.__name__)
+def test_htmx_and_query_params_are_cached_separately(client: TestClient):
+    assert client.get("/page").text == "<div>full  1</div>"
+    htmx_response = client.get("/page", headers={"HX-Request": "true"})
+    assert htmx_response.text == "<div>partial  2</div>"
+    assert client.get("/page", params={"q": "a"}).text == "<div>full a 3</div>"
+
+
+@pytest.mark.usefixtures(clock.__name__)
+def test_encoded_query_values_get_their_own_entry(client: TestClient):
+    assert client.get("/page?q=1%26b%3D2").text == "<div>full 1&amp;b=2 1</div>"
+    assert client.get("/page?q=1&b=2").text == "<div>full 1 2</div>"
+
+
+@pytest.mark.usefixtures(clock.__name__)
+def test_cookies_are_not_replayed_from_cache(client: TestClient):
+    assert client.get("/visit").headers["set-cookie"].startswith("session=visitor-1")
+    cached = client.get("/visit")
+    assert cached.text == "<div>welcome</div>"
+    assert "set-cookie" not in cached.headers
+    assert calls == ["visit"]
+
+
+def test_routes_with_auth_scopes_cant_be_cached():
+    with pytest.raises(ValueError, match="/me"):
+        Router().path_function(
+            "GET",
+            "/me",
+            [AuthScope.Authenticated],
+            cache=RouteCache(ttl=60),
+        )
+
+
+@pytest.mark.usefixtures(clock.__name__)
+def test_invalidate_drops_entries(client: TestClient):
+    client.get("/page")
+    client.portal.call(page_cache.invalidate, "/page")  # type: ignore
+    assert client.get("/page").text == "<div>full  2</div>"
+
+
+def test_stale_entry_is_served_while_revalidating(client: TestClient, clock: Clock):
+    client.get("/page")
+    clock.now += 15
+    assert client.get("/page").text == "<div>full  1</div>"
+    client.portal.call(asyncio.sleep, 0.01)  # type: ignore
+    assert client.get("/page").text == "<div>full  2</div>"
+
+
+def test_expired_entry_calls_handler(client: TestClient, clock: Clock):
+    client.get("/page")
+    clock.now += 25
+    assert client.get("/page").text == "<div>full  2</div>"
+
+
+def test_in_memory_backend_evicts_least_recently_used():
+    async def fill() -> InMemoryCacheBackend:
+        backend = InMemoryCacheBackend(max_size=2)
+        entry = CachedResponse(b"", 200, [], 0)
+        await backend.set("a", entry)
+        await backend.set("b", entry)
+        await backend.get("a")
+        await backend.set("c", entry)
+        return backend
+
+    assert list(asyncio.run(fill()).entries) == ["a", "c"]
@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+import pytest
+
+from relax.app import AuthScope, HTMLResponse, Request, Router
+from relax.html import div
+from tests.unit.app.conftest import make_app
+
+router = Router()
+calls: list[str] = []
+
+
+@router.path_function("GET", "/slow", coalesce=True)
+async def slow_page(request: Request) -> HTMLResponse:
+    calls.append(request.url.path)
+    await asyncio.sleep(0.05)
+    return HTMLResponse(div(text=str(len(calls))))
+
+
+@router.path_function("GET", "/slow-welcome", coalesce=True)
+async def slow_welcome(request: Request) -> HTMLResponse:
+    calls.append(request.url.path)
+    await asyncio.sleep(0.05)
+    response = HTMLResponse(div(text="welcome"))
+    response.set_cookie("visitor", str(len(calls)))
+    return response
+
+
+async def fetch_concurrently(paths: list[str]) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=make_app(router))  # type: ignore
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.get(path) for path in paths))
+
+
+async def get_concurrently(paths: list[str]) -> list[str]:
+    return [response.text for response in await fetch_concurrently(paths)]
+
+
+def test_concurrent_requests_share_one_handler_call():
+    calls.clear()
+    assert asyncio.run(get_concurrently(["/slow"] * 5)) == ["<div>1</div>"] * 5
+    assert calls == ["/slow"]
+
+
+def test_different_keys_are_not_coalesced():
+    calls.clear()
+    texts = asyncio.run(get_concurrently(["/slow", "/slow?page=2"]))
+    assert sorted(texts) == ["<div>2</div>", "<div>2</div>"]
+    assert len(calls) == 2
+
+
+def test_sequential_requests_call_handler_again():
+    calls.clear()
+    asyncio.run(get_concurrently(["/slow"]))
+    asyncio.run(get_concurrently(["/slow"]))
+    assert len(calls) == 2
+
+
+def test_cookies_are_not_shared():
+    calls.clear()
+    responses = asyncio.run(fetch_concurrently(["/slow-welcome"] * 3))
+    assert [response.text for response in responses] == ["<div>welcome</div>"] * 3
+    assert sum("set-cookie" in response.headers for response in responses) == 1
+    assert calls == ["/slow-welcome"]
+
+
+def test_routes_with_auth_scopes_cant_be_coalesced():
+    with pytest.raises(ValueError, match="/me"):
+        Router().path_function(
+            "GET",
+            "/me",
+            [AuthScope.Authenticated],
+            coalesce=True,
+        )
@@ -0,0 +1,103 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.testclient import TestClient
+
+from relax.app import App, HTMLResponse, PathInt, Request, Router
+from relax.html import div
+from relax.injection import (
+    Container,
+    Injected,
+    MissingDependencyError,
+    add_injectable,
+    clear_injections,
+)
+from tests.unit.app.conftest import make_app
+
+router = Router()
+
+
+class Tenant:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+@router.path_function("GET", "/tenant")
+async def tenant_name(
+    request: Request,  # noqa: ARG001
+    *,
+    tenant: Tenant = Injected,
+) -> HTMLResponse:
+    return HTMLResponse(div(text=tenant.name))
+
+
+@router.path_function("GET", "/tenant/after/{delay}")
+async def tenant_name_after(
+    request: Request,  # noqa: ARG001
+    delay: PathInt,
+    *,
+    tenant: Tenant = Injected,
+) -> HTMLResponse:
+    await asyncio.sleep(delay / 100)
+    return HTMLResponse(div(text=tenant.name))
+
+
+class TenantConfig: ...
+
+
+def tenant_from_config(*, config: TenantConfig = Injected) -> Tenant:  # noqa: ARG001
+    return Tenant("configured")
+
+
+def make_tenant_app(name: str) -> App:
+    container = Container()
+    container.add_injectable(Tenant, Tenant(name))
+    return make_app(router, container=container)
+
+
+def test_apps_use_their_own_container():
+    first = TestClient(make_tenant_app("first"))
+    second = TestClient(make_tenant_app("second"))
+    assert first.get("/tenant").text == "<div>first</div>"
+    assert second.get("/tenant").text == "<div>second</div>"
+
+
+def test_apps_dont_share_the_default_container():
+    add_injectable(Tenant, Tenant("default"))
+    try:
+        first = make_app(router)
+        second = make_app(Router())
+    finally:
+        clear_injections()
+    first.container.views["view"] = {"path": "", "data": {}, "signature": ""}
+
+    assert TestClient(first).get("/tenant").text == "<div>default</div>"
+    assert not second.container.views
+
+
+def test_router_cannot_be_added_to_two_apps():
+    app = make_app(router)
+    with pytest.raises(ValueError, match="already added"):
+        App(config=app.config).add_router(router)
+
+
+def test_broken_provider_graph_fails_startup():
+    container = Container()
+    container.add_provider(Tenant, tenant_from_config)
+    app = make_app(router, container=container)
+    with pytest.raises(MissingDependencyError), TestClient(app):
+        pass
+
+
+async def get_concurrently(app: App, paths: list[str]) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)  # type: ignore
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.get(path) for path in paths))
+
+
+def test_concurrent_requests_share_the_app_container():
+    # the first request to enter the container is the first to leave it
+    paths = ["/tenant/after/1", "/tenant/after/5", "/tenant/after/3"]
+    responses = asyncio.run(get_concurrently(make_tenant_app("shared"), paths))
+    assert [response.text for response in responses] == ["<div>shared</div>"] * 3
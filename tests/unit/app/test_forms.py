@@ -0,0 +1,100 @@
+from dataclasses import dataclass, field
+
+import pytest
+from pydantic import BaseModel
+from starlette.datastructures import UploadFile
+from starlette.responses import PlainTextResponse
+from starlette.testclient import TestClient
+
+from relax.app import Request, Router
+from relax.forms import form_decoder
+from tests.unit.app.conftest import make_app
+
+router = Router()
+
+
+@dataclass
+class ItemForm:
+    name: str
+    quantity: int | None
+    tags: list[int] = field(default_factory=list)
+    public: bool = False
+    description: str = "none"
+
+
+class ItemModel(BaseModel):
+    name: str
+    tags: list[int] = []
+
+
+@dataclass
+class UploadForm:
+    upload: UploadFile
+
+
+@router.path_function("POST", "/dataclass")
+async def post_dataclass(request: Request) -> PlainTextResponse:
+    async with request.parse_form(ItemForm) as item:
+        return PlainTextResponse(repr(item))
+
+
+@router.path_function("POST", "/model")
+async def post_model(request: Request) -> PlainTextResponse:
+    async with request.parse_form(ItemModel) as item:
+        return PlainTextResponse(repr(item))
+
+
+@router.path_function("POST", "/upload")
+async def post_upload(request: Request) -> PlainTextResponse:
+    async with request.parse_form(
+        UploadForm,
+        max_upload_size=1000,
+        spool_max_size=10,
+    ) as form:
+        content = await form.upload.read()
+        rolled = form.upload.file._rolled  # type: ignore
+        return PlainTextResponse(f"{len(content)} {rolled}")
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    return TestClient(make_app(router))
+
+
+def test_decoder_is_compiled_once_per_shape():
+    assert form_decoder(ItemForm) is form_decoder(ItemForm)
+
+
+def test_invalid_shape_raises_error():
+    with pytest.raises(TypeError):
+        form_decoder(dict)
+
+
+def test_dataclass_form_is_decoded(client: TestClient):
+    response = client.post(
+        "/dataclass",
+        data={"name": "pen", "quantity": "", "tags": ["1", "2"], "public": "on"},
+    )
+    assert response.text == repr(
+        ItemForm(name="pen", quantity=None, tags=[1, 2], public=True),
+    )
+
+
+def test_dataclass_form_uses_defaults(client: TestClient):
+    response = client.post("/dataclass", data={"name": "pen", "quantity": "3"})
+    assert response.text == repr(ItemForm(name="pen", quantity=3))
+
+
+def test_model_form_is_decoded(client: TestClient):
+    response = client.post("/model", data={"name": "pen", "tags": ["1", "2"]})
+    assert response.text == repr(ItemModel(name="pen", tags=[1, 2]))
+
+
+def test_upload_is_spooled_to_disk(client: TestClient):
+    response = client.post("/upload", files={"upload": ("a.txt", b"a" * 100)})
+    assert response.text == "100 True"
+
+
+def test_upload_over_limit_is_rejected(client: TestClient):
+    response = client.post("/upload", files={"upload": ("a.txt", b"a" * 1001)})
+    assert response.status_code == 413
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+from relax.app import IMPORTS, hot_replace_templates
+from relax.broadcast import Broadcaster
+from relax.hmr import ModuleGraph, module_name, signatures, signatures_changed
+from relax.injection import Container
+
+PACKAGE = "hmr_templates"
+FILES = {
+    "__init__.py": "",
+    "text.py": 'GREETING = "hi"\n',
+    "greet.py": """\
+from relax.html import Element, div
+from relax.injection import component
+
+from .text import GREETING
+
+
+@component(key=lambda name: name)
+def greet(name: str) -> Element:
+    return div(text=f"{GREETING} {name}")
+""",
+    "page.py": """\
+from relax.html import Element, div
+from relax.injection import component
+
+from hmr_templates import greet
+
+
+@component()
+def page() -> Element:
+    return div().insert(greet.greet(name="ann"))
+""",
+    "footer.py": """\
+from relax.html import Element, div
+from relax.injection import component
+
+
+@component()
+def footer() -> Element:
+    return div(text="bye")
+""",
+}
+
+# components are registered again when their module is reloaded
+pytestmark = pytest.mark.filterwarnings("ignore:Component")
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+
+    async def send_text(self, data: str) -> None:
+        self.messages.append(data)
+
+
+def forget_package() -> None:
+    for name in list(sys.modules):
+        if name.split(".")[0] == PACKAGE:
+            del sys.modules[name]
+            IMPORTS.pop(name, None)
+
+
+@pytest.fixture()
+def templates(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    package = tmp_path / PACKAGE
+    package.mkdir()
+    for name, source in FILES.items():
+        (package / name).write_text(source)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield package
+    forget_package()
+
+
+@pytest.mark.usefixtures(templates.__name__)
+def test_module_name_from_relative_path():
+    assert module_name(Path("hmr_templates/greet.py")) == "hmr_templates.greet"
+    assert module_name(Path("hmr_templates/__init__.py")) == "hmr_templates"
+
+
+def test_graph_finds_modules_importing_changed_ones(templates: Path):
+    import hmr_templates.footer
+    import hmr_templates.page  # noqa: F401
+
+    graph = ModuleGraph(templates)
+    graph.scan()
+    assert graph.dependents({"hmr_templates.text"}) == {
+        "hmr_templates.text",
+        "hmr_templates.greet",
+        "hmr_templates.page",
+    }
+    assert graph.dependents({"hmr_templates.footer"}) == {"hmr_templates.footer"}
+
+
+def test_modules_reload_after_the_ones_they_import(templates: Path):
+    import hmr_templates.page  # noqa: F401
+
+    graph = ModuleGraph(templates)
+    graph.scan()
+    assert graph.reload_order({"hmr_templates.text"}) == [
+        "hmr_templates.text",
+        "hmr_templates.greet",
+        "hmr_templates.page",
+    ]
+
+
+def hot_replace(
+    templates: Path,
+    changed_file: str,
+    new_source: str,
+    mounted: set[str] | None = None,
+) -> tuple[bool, list[str]]:
+    import hmr_templates.footer
+    import hmr_templates.page
+
+    container = Container()
+    container.record_views = True
+    client = FakeClient()
+    broadcaster = Broadcaster()
+
+    async def replace() -> bool:
+        broadcaster.connect(client)  # type: ignore
+        broadcaster.clients[client].mounted = mounted  # type: ignore
+        restart = await hot_replace_templates(
+            [f"{PACKAGE}/{changed_file}"],
+            graph=graph,
+            broadcaster=broadcaster,
+        )
+        await broadcaster.drain()
+        return restart
+
+    with container:
+        hmr_templates.page.page().render()
+        hmr_templates.footer.footer().render()
+        graph = ModuleGraph(templates)
+        graph.scan()
+        (templates / changed_file).write_text(new_source)
+        restart = asyncio.run(replace())
+    return restart, client.messages
+
+
+def test_modules_importing_changed_ones_are_reloaded(templates: Path):
+    restart, messages = hot_replace(templates, "text.py", 'GREETING = "hello"\n')
+    assert not restart
+    (message,) = messages
+    assert json.loads(message)["data"]["greet-ann"] == (
+        '<div id="greet-ann" class="greet">hello ann</div>'
+    )
+
+
+def test_changed_signatures_require_a_restart(templates: Path):
+    source = FILES["greet.py"].replace("name: str)", "name: str, title: str)")
+    restart, messages = hot_replace(templates, "greet.py", source)
+    assert restart
+    assert messages == []
+
+
+def load_source(source: str) -> ModuleType:
+    module = ModuleType("reloaded")
+    exec(source, vars(module))  # noqa: S102
+    return module
+
+
+def test_object_defaults_compare_by_type():
+    source = """\
+class Options: ...
+
+
+def render(name: str, options: Options = Options(), limit: int = 3) -> str:
+    return name
+"""
+    before = signatures(load_source(source))
+    assert signatures_changed(before, signatures(load_source(source))) == []
+    changed = source.replace("limit: int = 3", "limit: int = 4")
+    assert signatures_changed(before, signatures(load_source(changed))) == ["render"]
+
+
+def test_only_affected_views_are_sent(templates: Path):
+    source = FILES["greet.py"].replace("GREETING}", "GREETING}!")
+    _, messages = hot_replace(templates, "greet.py", source)
+    (message,) = messages
+    assert json.loads(message)["data"] == {
+        "greet-ann": '<div id="greet-ann" class="greet">hi! ann</div>',
+        "page": (
+            '<div id="page" class="page">'
+            '<div id="greet-ann" class="greet">hi! ann</div></div>'
+        ),
+    }
+
+
+def test_views_no_client_shows_are_not_rendered(templates: Path):
+    source = FILES["greet.py"].replace("GREETING}", "GREETING}!")
+    _, messages = hot_replace(templates, "greet.py", source, mounted={"greet-ann"})
+    (message,) = messages
+    assert list(json.loads(message)["data"]) == ["greet-ann"]
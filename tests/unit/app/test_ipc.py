@@ -0,0 +1,102 @@
+import asyncio
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+import relax.app
+from relax.app import intermediary_hot_replace_templates
+from relax.ipc import ReloadChannel
+
+
+@contextmanager
+def reload_server(path: Path) -> Iterator[None]:
+    # the app side, listening in its own event loop like in the app process
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    server: asyncio.Server | None = None
+
+    async def start() -> None:
+        nonlocal server
+        server = await asyncio.start_unix_server(
+            intermediary_hot_replace_templates,
+            path,
+        )
+        started.set()
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(start(), loop)
+    started.wait(5)
+    try:
+        yield
+    finally:
+
+        async def stop() -> None:
+            assert server is not None
+            server.close()
+            # closing the server doesn't close the open connections
+            for task in asyncio.all_tasks():
+                if task is not asyncio.current_task():
+                    task.cancel()
+
+        asyncio.run_coroutine_threadsafe(stop(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+
+@pytest.fixture()
+def received(monkeypatch: pytest.MonkeyPatch) -> list[list[str]]:
+    received: list[list[str]] = []
+
+    async def hot_replace_templates(changed_paths: list[str], **_: Any) -> bool:
+        received.append(changed_paths)
+        return "restart.py" in changed_paths
+
+    monkeypatch.setattr(relax.app, "hot_replace_templates", hot_replace_templates)
+    return received
+
+
+def test_changes_are_kept_until_the_app_listens(
+    tmp_path: Path,
+    received: list[list[str]],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr("relax.ipc.RETRY_INTERVAL", 0.0)
+    path = tmp_path / "reload.sock"
+    channel = ReloadChannel(path)
+    assert not channel.update_views(["a.py", "b.py"])
+    assert not channel.update_views(["b.py", "c.py"])
+    with reload_server(path):
+        assert not channel.flush()
+        channel.close()
+    assert received == [["a.py", "b.py", "c.py"]]
+
+
+def test_large_batches_arrive_whole(tmp_path: Path, received: list[list[str]]):
+    path = tmp_path / "reload.sock"
+    paths = [f"templates/page_{idx}.py" for idx in range(5000)]
+    with reload_server(path):
+        channel = ReloadChannel(path)
+        assert not channel.update_views(paths)
+        assert channel.update_views(["restart.py"])
+        channel.close()
+    assert received == [paths, ["restart.py"]]
+
+
+def test_channel_reconnects_to_a_restarted_app(
+    tmp_path: Path,
+    received: list[list[str]],
+):
+    path = tmp_path / "reload.sock"
+    channel = ReloadChannel(path)
+    with reload_server(path):
+        channel.update_views(["a.py"])
+    with reload_server(path):
+        channel.update_views(["b.py"])
+        channel.close()
+    assert received == [["a.py"], ["b.py"]]
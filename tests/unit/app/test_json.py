@@ -0,0 +1,104 @@
+from collections.abc import AsyncIterator
+
+import pytest
+from pydantic import BaseModel
+from starlette.responses import PlainTextResponse, RedirectResponse
+from starlette.testclient import TestClient
+
+from relax.app import HTMLResponse, PathInt, QueryStr, Request, Router
+from relax.html import div
+from tests.unit.app.conftest import make_app
+
+router = Router()
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+@router.path_function("GET", "/items/{item_id}")
+async def get_item(request: Request, item_id: PathInt) -> Item:  # noqa: ARG001
+    return Item(id=item_id, name="pen")
+
+
+@router.path_function("GET", "/items")
+async def list_items(request: Request) -> list[Item]:  # noqa: ARG001
+    return [Item(id=1, name="pen"), Item(id=2, name="ink")]
+
+
+@router.path_function("GET", "/stream")
+async def stream_items(request: Request) -> AsyncIterator[Item]:  # noqa: ARG001
+    for idx in range(3):
+        yield Item(id=idx, name="pen")
+
+
+@router.path_function("GET", "/empty-stream")
+async def empty_stream(request: Request) -> AsyncIterator[Item]:  # noqa: ARG001
+    return
+    yield
+
+
+@router.path_function("GET", "/response")
+async def explicit_response(request: Request) -> Item:  # noqa: ARG001
+    return PlainTextResponse("plain")  # type: ignore
+
+
+@router.path_function("GET", "/maybe-redirect")
+async def maybe_redirect(
+    request: Request,  # noqa: ARG001
+    to: QueryStr = "",
+) -> HTMLResponse | RedirectResponse | None:
+    if to:
+        return RedirectResponse(to)
+    return HTMLResponse(div(text="here"))
+
+
+class Opaque: ...
+
+
+@router.path_function("GET", "/opaque")
+async def opaque(request: Request) -> Opaque:  # noqa: ARG001
+    return PlainTextResponse("opaque")  # type: ignore
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    return TestClient(make_app(router))
+
+
+def test_model_is_serialized(client: TestClient):
+    response = client.get("/items/42")
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == b'{"id":42,"name":"pen"}'
+
+
+def test_list_is_serialized(client: TestClient):
+    assert client.get("/items").json() == [
+        {"id": 1, "name": "pen"},
+        {"id": 2, "name": "ink"},
+    ]
+
+
+def test_async_iterator_is_streamed_as_array(client: TestClient):
+    response = client.get("/stream")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [{"id": idx, "name": "pen"} for idx in range(3)]
+
+
+def test_empty_stream_is_empty_array(client: TestClient):
+    assert client.get("/empty-stream").content == b"[]"
+
+
+def test_returned_responses_are_not_serialized(client: TestClient):
+    assert client.get("/response").text == "plain"
+
+
+def test_union_of_responses_is_not_serialized(client: TestClient):
+    assert client.get("/maybe-redirect").text == "<div>here</div>"
+    response = client.get("/maybe-redirect?to=/items", follow_redirects=False)
+    assert response.headers["location"] == "/items"
+
+
+def test_types_pydantic_cant_serialize_are_returned_as_is(client: TestClient):
+    assert client.get("/opaque").text == "opaque"
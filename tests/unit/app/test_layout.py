@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from starlette.responses import RedirectResponse
+from starlette.testclient import TestClient
+
+from relax.app import HTMLResponse, Layout, LayoutError, Request, Router
+from relax.html import Element, body, div, head, html, title
+from tests.unit.app.conftest import make_app
+
+router = Router()
+shell_renders: list[int] = []
+events: list[str] = []
+
+
+def page_root(child: Element) -> Element:
+    shell_renders.append(1)
+    return html(lang="en").insert(head().insert(title("app")), body().insert(child))
+
+
+layout = Layout(page_root)
+
+
+@router.path_function("GET", "/page", layout=layout)
+async def page(request: Request) -> HTMLResponse:  # noqa: ARG001
+    events.append("handler")
+    return HTMLResponse(div(text="content"))
+
+
+@router.path_function("GET", "/old-page", layout=layout)
+async def old_page(request: Request) -> RedirectResponse:  # noqa: ARG001
+    return RedirectResponse("/page")
+
+
+@router.path_function("GET", "/login", layout=layout)
+async def login(request: Request) -> HTMLResponse:  # noqa: ARG001
+    response = HTMLResponse(div(text="welcome"))
+    response.set_cookie("session", "secret")
+    return response
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    return TestClient(make_app(router))
+
+
+def test_full_page_is_rendered_into_layout(client: TestClient):
+    assert client.get("/page").text == (
+        '<!DOCTYPE html><html lang="en"><head><title>app</title></head>'
+        "<body><div>content</div></body></html>"
+    )
+
+
+def test_htmx_request_skips_layout(client: TestClient):
+    assert client.get("/page", headers={"HX-Request": "true"}).text == (
+        "<div>content</div>"
+    )
+
+
+def layout_error(client: TestClient, path: str) -> str:
+    # raised from the task streaming the response
+    with pytest.raises(ExceptionGroup) as info:
+        client.get(path, follow_redirects=False)
+    errors = info.value.subgroup(LayoutError)
+    assert errors is not None
+    return str(errors.exceptions[0])
+
+
+def test_redirect_cant_be_streamed_into_layout(client: TestClient):
+    assert "307 response" in layout_error(client, "/old-page")
+    # partials aren't streamed, so redirects work as usual
+    response = client.get(
+        "/old-page",
+        headers={"HX-Request": "true"},
+        follow_redirects=False,
+    )
+    assert response.headers["location"] == "/page"
+
+
+def test_headers_of_handler_cant_be_streamed_into_layout(client: TestClient):
+    assert "['set-cookie']" in layout_error(client, "/login")
+
+
+def test_shell_is_rendered_once(client: TestClient):
+    layout.invalidate()
+    shell_renders.clear()
+    client.get("/page")
+    client.get("/page")
+    assert shell_renders == [1]
+
+
+def test_reloaded_layout_replaces_the_shell(client: TestClient):
+    def reloaded_root(child: Element) -> Element:
+        return html(lang="fr").insert(body().insert(child))
+
+    # as if the module defining the shell was reloaded
+    reloaded_root.__qualname__ = page_root.__qualname__
+    reloaded_root.__module__ = page_root.__module__
+    try:
+        assert Layout(reloaded_root) is layout
+        assert '<html lang="fr">' in client.get("/page").text
+    finally:
+        Layout(page_root)
+
+
+def test_prefix_is_sent_before_handler_runs():
+    async def content() -> HTMLResponse:
+        events.append("handler")
+        return HTMLResponse(div())
+
+    async def collect() -> None:
+        async for chunk in layout.stream(content()).body_iterator:
+            events.append(f"chunk {len(chunk)}")
+
+    events.clear()
+    asyncio.run(collect())
+    assert events[:2] == [f"chunk {len(layout.parts[0])}", "handler"]
@@ -0,0 +1,102 @@
+import importlib
+import json
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from starlette.testclient import TestClient
+
+import tests.unit.app
+from relax.injection import COMPONENTS, ComponentPlan
+from relax.manifest import (
+    ManifestError,
+    build_manifest,
+    load_manifest,
+    write_manifest,
+)
+from tests.unit.app.conftest import make_app
+
+MODULE = "tests.unit.app.manifest_routes"
+
+# the routes module is imported again by every test
+pytestmark = pytest.mark.filterwarnings("ignore:Component greeting")
+
+
+def forget_routes_module() -> None:
+    # the next import runs the module again, like in a fresh process
+    sys.modules.pop(MODULE, None)
+    vars(tests.unit.app).pop("manifest_routes", None)
+
+
+@pytest.fixture()
+def manifest_path(tmp_path: Path) -> Iterator[Path]:
+    app = make_app(importlib.import_module(MODULE).router)
+    path = tmp_path / "manifest.json"
+    write_manifest(app, path)
+    forget_routes_module()
+    yield path
+    forget_routes_module()
+
+
+def test_manifest_lists_routes_and_components():
+    app = make_app(importlib.import_module(MODULE).router)
+    manifest = build_manifest(app)
+    (route,) = manifest["routes"]
+    assert route["name"] == "greet"
+    assert route["path"] == "/greet/{name}"
+    assert route["module"] == MODULE
+    assert route["compiled"]
+    assert [
+        (extractor["name"], extractor["source"], extractor["converter"])
+        for extractor in route["extractors"]
+    ] == [
+        ("name", "path_param", "builtins:str"),
+        ("times", "query_param", "builtins:int"),
+    ]
+    assert json.loads(json.dumps(manifest))["components"][f"{MODULE}:greeting"] == {
+        "takes_id": False,
+        "key_params": ["name"],
+    }
+
+
+def test_loaded_routes_import_their_module_on_first_request(manifest_path: Path):
+    app = make_app()
+    load_manifest(app, manifest_path)
+    assert MODULE not in sys.modules
+    assert app.url_builders["greet"](name="ann", times=2) == "/greet/ann?times=2"
+
+    response = TestClient(app).get("/greet/ann?times=2")
+    assert response.text == (
+        '<div id="greeting-ann" class="greeting">hi ann hi ann</div>'
+    )
+    assert MODULE in sys.modules
+    assert COMPONENTS[f"{MODULE}:greeting"] == ComponentPlan(
+        takes_id=False,
+        key_params=("name",),
+    )
+
+
+def test_path_functions_build_urls_with_the_manifest_app(manifest_path: Path):
+    app = make_app()
+    load_manifest(app, manifest_path)
+    manifest_routes = importlib.import_module(MODULE)
+    assert manifest_routes.greet(name="bo") == "/greet/bo"
+
+
+def test_manifest_loaded_after_import_binds_the_router(manifest_path: Path):
+    manifest_routes = importlib.import_module(MODULE)
+    app = make_app()
+    load_manifest(app, manifest_path)
+    assert manifest_routes.router.app is app
+    assert manifest_routes.greet(name="bo") == "/greet/bo"
+    assert TestClient(app).get("/greet/bo").text == (
+        '<div id="greeting-bo" class="greeting">hi bo</div>'
+    )
+
+
+def test_unknown_manifest_version_raises_error(tmp_path: Path):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"version": 0, "routes": [], "components": {}}))
+    with pytest.raises(ManifestError, match="not a version 1"):
+        load_manifest(make_app(), path)
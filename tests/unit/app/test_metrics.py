@@ -0,0 +1,64 @@
+import pytest
+from starlette.exceptions import HTTPException
+from starlette.testclient import TestClient
+
+from relax.app import HTMLResponse, Request, Router
+from relax.html import div
+from relax.metrics import Metrics
+from tests.unit.app.conftest import make_app
+
+router = Router()
+
+
+@router.path_function("GET", "/ok")
+async def ok_page(request: Request) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(div())
+
+
+@router.path_function("GET", "/missing")
+async def missing_page(request: Request) -> HTMLResponse:  # noqa: ARG001
+    raise HTTPException(status_code=404)
+
+
+@pytest.fixture()
+def metrics() -> Metrics:
+    return Metrics(path="/_metrics", buckets=(0.1, 1))
+
+
+@pytest.fixture()
+def client(metrics: Metrics) -> TestClient:
+    return TestClient(make_app(router, metrics=metrics))
+
+
+def test_counts_requests_by_status(client: TestClient, metrics: Metrics):
+    client.get("/ok")
+    client.get("/ok")
+    client.get("/missing")
+    assert dict(metrics.routes["ok_page"].statuses) == {200: 2}
+    assert dict(metrics.routes["missing_page"].statuses) == {404: 1}
+
+
+def test_histogram_buckets():
+    metrics = Metrics(buckets=(0.1, 1))
+    metrics.observe("page", 200, 0.05)
+    metrics.observe("page", 200, 0.1)
+    metrics.observe("page", 200, 0.5)
+    metrics.observe("page", 200, 3)
+    assert metrics.routes["page"].buckets == [2, 1, 1]
+
+
+def test_prometheus_text(client: TestClient):
+    client.get("/ok")
+    response = client.get("/_metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert 'relax_requests_total{route="ok_page",status="200"} 1' in lines
+    assert 'relax_request_duration_seconds_bucket{route="ok_page",le="+Inf"} 1' in (
+        lines
+    )
+    assert 'relax_request_duration_seconds_count{route="missing_page"} 0' in lines
+    assert "relax_thread_pool_queued 0" in lines
+
+
+def test_without_metrics_routes_are_not_instrumented():
+    assert TestClient(make_app(router)).get("/metrics").status_code == 404
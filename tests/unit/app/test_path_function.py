@@ -0,0 +1,73 @@
+from inspect import Parameter
+
+import pytest
+from starlette.testclient import TestClient
+
+from relax.app import (
+    HTMLResponse,
+    ParamExtractor,
+    PathInt,
+    QueryInt,
+    QueryStr,
+    Request,
+    Router,
+    compile_extractors,
+)
+from relax.html import div
+from tests.unit.app.conftest import make_app
+
+router = Router()
+
+
+@router.path_function("GET", "/items/{item_id}")
+async def get_item(
+    request: Request,  # noqa: ARG001
+    item_id: PathInt,
+    page: QueryInt = 1,
+    sort: QueryStr | None = None,
+) -> HTMLResponse:
+    return HTMLResponse(div(text=f"{item_id + 1} {page + 1} {sort}"))
+
+
+@router.path_function("GET", "/required")
+async def required_query(
+    request: Request,  # noqa: ARG001
+    name: QueryStr,
+) -> HTMLResponse:
+    return HTMLResponse(div(text=name))
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    return TestClient(make_app(router))
+
+
+async def helper_function(
+    _request: Request,
+    _item_id: PathInt,
+    _page: QueryInt = 1,
+    *,
+    _other: str = "not extracted",
+) -> HTMLResponse:
+    return HTMLResponse(div())
+
+
+def test_extractors_are_compiled_from_signature():
+    assert compile_extractors(helper_function) == [
+        ParamExtractor("_item_id", "path_param", int, Parameter.empty),
+        ParamExtractor("_page", "query_param", int, 1),
+    ]
+
+
+def test_path_and_query_params_are_converted(client: TestClient):
+    response = client.get("/items/41", params={"page": "2", "sort": "asc"})
+    assert response.text == "<div>42 3 asc</div>"
+
+
+def test_query_params_use_defaults(client: TestClient):
+    assert client.get("/items/41").text == "<div>42 2 None</div>"
+
+
+def test_missing_required_query_param_raises_error(client: TestClient):
+    with pytest.raises(TypeError):
+        client.get("/required")
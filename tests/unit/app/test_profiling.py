@@ -0,0 +1,91 @@
+import pstats
+import sys
+from pathlib import Path
+from types import FrameType
+
+import pytest
+from starlette.authentication import (
+    AuthCredentials,
+    AuthenticationBackend,
+    SimpleUser,
+)
+from starlette.requests import HTTPConnection
+from starlette.testclient import TestClient
+
+from relax.app import HTMLResponse, Request, Router
+from relax.html import Element, div
+from relax.injection import component
+from relax.profiling import Profiler, collapse_stack
+from tests.unit.app.conftest import make_app
+
+router = Router()
+frames: list[FrameType] = []
+
+
+@component()
+def profiled_card() -> Element:
+    frames.append(sys._getframe())
+    return div()
+
+
+@router.path_function("GET", "/profiled")
+async def profiled_page(request: Request) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(profiled_card())
+
+
+class HeaderBackend(AuthenticationBackend):
+    async def authenticate(
+        self,
+        conn: HTTPConnection,
+    ) -> tuple[AuthCredentials, SimpleUser] | None:
+        if conn.headers.get("X-Debug") != "secret":
+            return None
+        return AuthCredentials(["debug"]), SimpleUser("admin")
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    app = make_app(
+        router,
+        auth_backend=HeaderBackend(),
+        profiler=Profiler(scopes=["debug"]),
+    )
+    return TestClient(app)
+
+
+def test_frames_are_labeled_by_route_and_component(client: TestClient):
+    frames.clear()
+    client.get("/profiled")
+    stack = collapse_stack(frames[0]).split(";")
+    assert stack[-1] == "component:profiled-card"
+    assert "route:profiled_page" in stack
+
+
+def test_profiler_requires_auth(client: TestClient):
+    assert client.get("/_debug/profile?seconds=0").status_code == 403
+
+
+def test_collapsed_stacks(client: TestClient):
+    response = client.get(
+        "/_debug/profile?seconds=0.05",
+        headers={"X-Debug": "secret"},
+    )
+    assert response.status_code == 200
+    stack, count = response.text.splitlines()[0].rsplit(" ", 1)
+    assert stack
+    assert int(count) > 0
+
+
+def test_pstats(client: TestClient, tmp_path: Path):
+    response = client.get(
+        "/_debug/profile?seconds=0.01&format=pstats",
+        headers={"X-Debug": "secret"},
+    )
+    assert response.status_code == 200
+    (tmp_path / "profile.pstats").write_bytes(response.content)
+    assert pstats.Stats(str(tmp_path / "profile.pstats")).total_calls > 0
+
+
+def test_profiler_needs_scopes():
+    with pytest.raises(ValueError, match="auth scope"):
+        Profiler(scopes=[])
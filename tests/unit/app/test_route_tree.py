@@ -0,0 +1,106 @@
+import pytest
+from starlette.testclient import TestClient
+
+from relax.app import HTMLResponse, PathInt, PathStr, Request, Router
+from relax.html import div
+from tests.unit.app.conftest import make_app
+
+router = Router()
+
+
+@router.path_function("GET", "/users/{user_id:int}")
+async def user_by_id(request: Request, user_id: PathInt) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(div(text=f"id {user_id + 1}"))
+
+
+@router.path_function("GET", "/users/me")
+async def current_user(request: Request) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(div(text="me"))
+
+
+@router.path_function("POST", "/users/{user_id:int}")
+async def update_user(request: Request, user_id: PathInt) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(div(text=f"updated {user_id}"))
+
+
+@router.path_function("DELETE", "/users/{user_id:int}/posts/{slug}")
+async def delete_post(
+    request: Request,  # noqa: ARG001
+    user_id: PathInt,
+    slug: PathStr,
+) -> HTMLResponse:
+    return HTMLResponse(div(text=f"deleted {user_id} {slug}"))
+
+
+@router.path_function("GET", "/files/{file_path:path}")
+async def get_file(request: Request, file_path: PathStr) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(div(text=file_path))
+
+
+@router.path_function("GET", "/report-{year:int}.html")
+async def yearly_report(request: Request, year: PathInt) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(div(text=f"report {year}"))
+
+
+@router.path_function("GET", "/items/new")
+async def new_item_form(request: Request) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(div(text="form"))
+
+
+@router.path_function("POST", "/items/{item_id}")
+async def update_item(request: Request, item_id: PathStr) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(div(text=f"updated {item_id}"))
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    return TestClient(make_app(router, route_tree=True))
+
+
+def test_path_params_are_converted(client: TestClient):
+    assert client.get("/users/41").text == "<div>id 42</div>"
+
+
+def test_static_segments_take_precedence(client: TestClient):
+    assert client.get("/users/me").text == "<div>me</div>"
+
+
+def test_route_is_picked_by_method(client: TestClient):
+    assert client.post("/users/42").text == "<div>updated 42</div>"
+
+
+@pytest.mark.parametrize("route_tree", [True, False])
+def test_param_route_matches_when_static_route_has_other_method(route_tree: bool):
+    client = TestClient(make_app(router, route_tree=route_tree))
+    assert client.post("/items/new").text == "<div>updated new</div>"
+    assert client.get("/items/new").text == "<div>form</div>"
+    assert client.put("/items/new").status_code == 405
+
+
+def test_multiple_path_params(client: TestClient):
+    response = client.delete("/users/42/posts/hello")
+    assert response.text == "<div>deleted 42 hello</div>"
+
+
+def test_path_convertor_matches_rest_of_path(client: TestClient):
+    assert client.get("/files/css/main.css").text == "<div>css/main.css</div>"
+
+
+def test_mixed_segments_fall_back_to_regex(client: TestClient):
+    assert client.get("/report-2024.html").text == "<div>report 2024</div>"
+
+
+def test_method_not_allowed_lists_all_methods(client: TestClient):
+    response = client.put("/users/42")
+    assert response.status_code == 405
+    assert response.headers["Allow"] == "GET, HEAD, POST"
+
+
+def test_unknown_path_is_not_found(client: TestClient):
+    assert client.get("/users/42/unknown").status_code == 404
+    assert client.get("/users/not-an-int").status_code == 404
+
+
+def test_url_path_for_uses_route_names(client: TestClient):
+    app = client.app
+    assert app.url_path_for("delete_post", user_id=1, slug="a") == "/users/1/posts/a"  # type: ignore
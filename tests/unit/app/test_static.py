@@ -0,0 +1,124 @@
+import asyncio
+import gzip
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from starlette.testclient import TestClient
+
+from relax.html import link, script
+from relax.static import (
+    IMMUTABLE,
+    MANIFEST_NAME,
+    AssetNotFoundError,
+    SendfileResponse,
+    StaticAssets,
+    build_assets,
+)
+from tests.unit.app.conftest import make_app
+
+CSS = "body { color: red; }\n" * 40
+
+
+@pytest.fixture()
+def built(tmp_path: Path) -> Path:
+    source = tmp_path / "static"
+    (source / "css").mkdir(parents=True)
+    (source / "css" / "main.css").write_text(CSS)
+    (source / "logo.png").write_bytes(b"\x89PNG not really")
+    output = tmp_path / "build"
+    build_assets(source, output)
+    return output
+
+
+def make_client(directory: Path) -> TestClient:
+    return TestClient(make_app(static=StaticAssets(directory)))
+
+
+def test_assets_are_fingerprinted_and_precompressed(built: Path):
+    names = json.loads((built / MANIFEST_NAME).read_text())
+    css, png = names["css/main.css"], names["logo.png"]
+    assert css.startswith("css/main.")
+    assert css.endswith(".css")
+    assert (built / css).read_text() == CSS
+    assert gzip.decompress((built / f"{css}.gz").read_bytes()).decode() == CSS
+    # images are compressed already
+    assert not (built / f"{png}.gz").exists()
+
+
+def test_html_helpers_resolve_fingerprinted_urls(built: Path):
+    assets = StaticAssets(built)
+    css_url = f"/static/{assets.names['css/main.css']}"
+    assert f'href="{css_url}" rel="stylesheet"' in link.asset("css/main.css").render()
+    assert script.asset("css/main.css", defer=True).render() == (
+        f'<script src="{css_url}" defer="true"></script>'
+    )
+    with pytest.raises(AssetNotFoundError):
+        link.asset("missing.css")
+
+
+def test_fingerprinted_assets_are_cached_forever(built: Path):
+    client = make_client(built)
+    url = link.asset("css/main.css")._attributes["href"]
+
+    response = client.get(url, headers={"accept-encoding": "gzip"})
+    assert response.text == CSS
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == IMMUTABLE
+    assert response.headers["content-type"].startswith("text/css")
+
+    plain = client.get(url, headers={"accept-encoding": "identity"})
+    assert plain.text == CSS
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+    etag = response.headers["etag"]
+    assert etag != plain.headers["etag"]
+    cached = client.get(url, headers={"accept-encoding": "gzip", "if-none-match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["vary"] == "Accept-Encoding"
+    # the gzipped etag doesn't match the identity encoded file
+    stale = client.get(
+        url,
+        headers={"accept-encoding": "identity", "if-none-match": etag},
+    )
+    assert stale.status_code == 200
+
+
+def test_only_fingerprinted_names_are_served(built: Path):
+    client = make_client(built)
+    assert client.get("/static/css/main.css").status_code == 404
+    assert client.get(f"/static/{MANIFEST_NAME}").status_code == 404
+
+
+def test_unbuilt_directories_are_served_by_logical_name(tmp_path: Path):
+    (tmp_path / "app.js").write_text("console.log(1)")
+    client = make_client(tmp_path)
+    response = client.get("/static/app.js")
+    assert response.text == "console.log(1)"
+    assert response.headers["cache-control"] == "no-cache"
+    assert client.get("/static/../secret").status_code == 404
+
+
+def test_files_are_handed_to_servers_supporting_zero_copy(built: Path):
+    path = next((built / "css").glob("main.*.css"))
+    messages: list[dict[str, Any]] = []
+
+    async def send(message: dict[str, Any]) -> None:
+        if message["type"] == "http.response.zerocopysend":
+            message = {**message, "file": message["file"].read()}
+        messages.append(message)
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request"}
+
+    response = SendfileResponse(path, stat_result=path.stat())
+    scope = {"type": "http", "extensions": {"http.response.zerocopysend": {}}}
+    asyncio.run(response(scope, receive, send))
+    assert messages[1] == {
+        "type": "http.response.zerocopysend",
+        "file": CSS.encode(),
+        "count": len(CSS),
+        "more_body": False,
+    }
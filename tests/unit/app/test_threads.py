@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from collections.abc import Callable
+from functools import wraps
+from typing import Any
+
+import pytest
+from starlette.testclient import TestClient
+
+from relax.app import HTMLResponse, Request, Router
+from relax.html import div
+from relax.injection import Container, Injected
+from relax.threads import PoolStats, ThreadPool
+from tests.unit.app.conftest import make_app
+
+router = Router()
+render_threads: list[str] = []
+
+
+class Greeting:
+    text = "hello"
+
+
+class RecordingDiv(div):
+    def render(self) -> str:
+        render_threads.append(threading.current_thread().name)
+        return super().render()
+
+
+@router.path_function("GET", "/sync")
+def sync_page(request: Request, *, greeting: Greeting = Injected) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(
+        div(text=f"{greeting.text} from {threading.current_thread().name}"),
+    )
+
+
+@router.path_function("GET", "/threaded", render_in_thread=True)
+async def threaded_page(request: Request) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(RecordingDiv(text="threaded"))
+
+
+@router.path_function("GET", "/big")
+async def big_page(request: Request) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(RecordingDiv(text="x" * 100))
+
+
+def logged(func: Callable[..., Any]) -> Callable[..., Any]:
+    # a sync wrapper, returning the coroutine of the async handler
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+@router.path_function("GET", "/decorated")
+@logged
+async def decorated_page(request: Request) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(div(text="decorated"))
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    container = Container()
+    container.add_injectable(Greeting, Greeting())
+    return TestClient(make_app(router, container=container, render_threshold=50))
+
+
+def test_sync_handler_runs_in_worker_thread(client: TestClient):
+    assert client.get("/sync").text.startswith("<div>hello from AnyIO worker thread")
+
+
+def test_render_in_thread(client: TestClient):
+    render_threads.clear()
+    response = client.get("/threaded")
+    assert response.text == "<div>threaded</div>"
+    assert response.headers["content-length"] == str(len("<div>threaded</div>"))
+    [thread_name] = render_threads
+    assert thread_name.startswith("AnyIO worker thread")
+
+
+def test_large_responses_render_in_thread_after_first(client: TestClient):
+    render_threads.clear()
+    first = client.get("/big").text
+    second = client.get("/big").text
+    assert first == second
+    assert not render_threads[0].startswith("AnyIO worker thread")
+    assert render_threads[1].startswith("AnyIO worker thread")
+
+
+def test_pool_stats_report_queue_depth():
+    pool = ThreadPool(1)
+    release = threading.Event()
+
+    async def run() -> PoolStats:
+        tasks = [asyncio.create_task(pool.run(release.wait)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        stats = pool.stats()
+        release.set()
+        await asyncio.gather(*tasks)
+        return stats
+
+    assert asyncio.run(run()) == PoolStats(size=1, active=1, queued=2)
+    assert pool.stats() == PoolStats(size=1, active=0, queued=0)
+
+
+def test_decorated_async_handler_is_awaited(client: TestClient):
+    assert client.get("/decorated").text == "<div>decorated</div>"
@@ -0,0 +1,60 @@
+from starlette.testclient import TestClient
+
+from relax.app import HTMLResponse, Request, Router
+from relax.html import Element, div
+from relax.injection import component
+from relax.timing import Timings
+from tests.unit.app.conftest import make_app
+
+router = Router()
+
+
+@component()
+def timed_card() -> Element:
+    return div(text="card")
+
+
+@router.path_function("GET", "/timed")
+async def timed_page(request: Request) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(div().insert(timed_card()))
+
+
+def make_client(**kwargs: object) -> TestClient:
+    return TestClient(make_app(router, **kwargs))
+
+
+def test_hooks_get_every_phase():
+    recorded: list[tuple[str, Timings]] = []
+    make_client(timing_hooks=[lambda *args: recorded.append(args)]).get("/timed")
+    [(route, timings)] = recorded
+    assert route == "timed_page"
+    assert set(timings.phases) == {
+        "extract",
+        "inject",
+        "handler",
+        "component",
+        "render",
+        "send",
+    }
+
+
+def test_server_timing_header():
+    response = make_client(server_timing=True).get("/timed")
+    phases = [
+        entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")
+    ]
+    assert phases == ["extract", "inject", "component", "render", "handler"]
+
+
+def test_no_server_timing_header_by_default_outside_dev():
+    assert "server-timing" not in make_client().get("/timed").headers
+
+
+def test_nested_phase_is_counted_once():
+    timings = Timings()
+    with timings.measure("component"), timings.measure("component"):
+        pass
+    with timings.measure("component"):
+        pass
+    assert list(timings.phases) == ["component"]
+    assert timings.phases["component"] > 0
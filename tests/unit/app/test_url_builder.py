@@ -0,0 +1,66 @@
+import pytest
+from starlette.routing import NoMatchFound
+from starlette.testclient import TestClient
+
+from relax.app import App, HTMLResponse, PathStr, QueryInt, QueryStr, Request, Router
+from relax.html import div
+from tests.unit.app.conftest import make_app
+
+router = Router()
+
+
+@router.path_function("GET", "/search/{category}")
+async def search(
+    request: Request,  # noqa: ARG001
+    category: PathStr,  # noqa: ARG001
+    q: QueryStr,  # noqa: ARG001
+    page: QueryInt = 1,  # noqa: ARG001
+) -> HTMLResponse:
+    return HTMLResponse(div())
+
+
+@router.path_function("GET", "/files/{file_path:path}")
+async def get_file(request: Request, file_path: PathStr) -> HTMLResponse:  # noqa: ARG001
+    return HTMLResponse(div())
+
+
+@router.path_function("GET", "/link")
+async def link(request: Request) -> HTMLResponse:
+    return HTMLResponse(div(text=str(request.url_of(get_file, file_path="a b/c"))))
+
+
+@pytest.fixture()
+def app() -> App:
+    return make_app(router)
+
+
+@pytest.mark.usefixtures(app.__name__)
+def test_url_params_are_percent_encoded():
+    assert search(category="a b", q="x&y=<z>") == "/search/a%20b?q=x%26y%3D%3Cz%3E"
+
+
+@pytest.mark.usefixtures(app.__name__)
+def test_query_params_with_defaults_can_be_given():
+    assert search(category="books", q="dune", page=2) == "/search/books?q=dune&page=2"
+
+
+@pytest.mark.usefixtures(app.__name__)
+def test_missing_query_param_without_default_raises_error():
+    with pytest.raises(ValueError, match="missing query parameter q"):
+        search(category="books")
+
+
+@pytest.mark.usefixtures(app.__name__)
+def test_missing_path_param_raises_error():
+    with pytest.raises(NoMatchFound):
+        search(q="dune")
+
+
+@pytest.mark.usefixtures(app.__name__)
+def test_path_convertor_keeps_slashes():
+    assert get_file(file_path="css/main file.css") == "/files/css/main%20file.css"
+
+
+def test_request_url_of_uses_url_builders(app: App):
+    response = TestClient(app).get("/link")
+    assert response.text == "<div>http://testserver/files/a%20b/c</div>"
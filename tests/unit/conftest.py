@@ -0,0 +1,8 @@
+class Clock:
+    """Stands in for `monotonic`, in the module of the code under test."""
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
@@ -0,0 +1,58 @@
+import pytest
+from relax import html, injection
+
+
+class HelperType:
+    def __init__(self, identifier: str = "default") -> None:
+        self.identifier = identifier
+
+
+@injection.injectable_sync
+def helper_function(*, helper_arg: HelperType = injection.Injected) -> HelperType:
+    return helper_arg
+
+
+@injection.component()
+def helper_container_component() -> html.Element:
+    return html.div(text="helper")
+
+
+def test_injection_uses_current_container():
+    first = HelperType("first")
+    second = HelperType("second")
+    with injection.Container() as container:
+        container.add_injectable(HelperType, first)
+        assert helper_function() is first
+        with injection.Container() as nested:
+            nested.add_injectable(HelperType, second)
+            assert helper_function() is second
+        assert helper_function() is first
+
+
+def test_containers_do_not_leak_into_default_container():
+    with injection.Container() as container:
+        container.add_injectable(HelperType, HelperType())
+    with pytest.raises(injection.MissingDependencyError):
+        helper_function()
+
+
+def test_module_functions_use_current_container():
+    with injection.Container() as container:
+        injection.add_injectable(HelperType, HelperType())
+        assert HelperType in container.injects
+    assert HelperType not in injection._INJECTS
+
+
+def test_component_views_are_recorded_in_current_container():
+    with injection.Container() as container:
+        container.record_views = True
+        helper_container_component()
+    assert container.views["helper-container-component"]["path"] == (
+        f"{__name__}.helper_container_component"
+    )
+
+
+def test_component_views_are_not_recorded_by_default():
+    with injection.Container() as container:
+        helper_container_component()
+    assert container.views == {}
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from relax import injection
+
+
+class Config:
+    def __init__(self, url: str = "sqlite://") -> None:
+        self.url = url
+
+
+class Database:
+    def __init__(self, *, config: Config = injection.Injected) -> None:
+        self.config = config
+
+
+class Repository:
+    def __init__(self, *, db: Database = injection.Injected) -> None:
+        self.db = db
+
+
+class First: ...
+
+
+class Second: ...
+
+
+def make_first(*, _: Second = injection.Injected) -> First:
+    return First()
+
+
+def make_second(*, _: First = injection.Injected) -> Second:
+    return Second()
+
+
+@pytest.fixture(autouse=True)
+def _clear_injections() -> Iterator[None]:
+    yield
+    injection.clear_injections()
+
+
+@injection.injectable_sync
+def helper_function(*, repo: Repository = injection.Injected) -> Repository:
+    return repo
+
+
+def test_providers_are_built_in_dependency_order():
+    injection.add_provider(Repository, Repository)
+    injection.add_provider(Database, Database)
+    config = Config()
+    injection.add_injectable(Config, config)
+
+    repo = helper_function()
+
+    assert repo.db.config is config
+    assert injection.retrieve_injectable(Database) is repo.db
+
+
+def test_providers_are_built_once():
+    calls = []
+
+    def make_config() -> Config:
+        calls.append(1)
+        return Config()
+
+    injection.add_provider(Config, make_config)
+    injection.add_provider(Database, Database)
+    injection.add_provider(Repository, Repository)
+    injection.resolve_providers()
+
+    assert helper_function() is helper_function()
+    assert calls == [1]
+
+
+def test_only_needed_providers_are_built():
+    def make_first() -> First:
+        pytest.fail("First is not needed")
+
+    injection.add_provider(First, make_first)
+    injection.add_provider(Database, Database)
+    injection.add_injectable(Config, Config())
+
+    assert injection.retrieve_injectable(Database).config
+    assert First not in injection.current_container().injects
+
+
+def test_providers_are_built_once_across_threads():
+    calls = []
+
+    def make_config() -> Config:
+        calls.append(threading.get_ident())
+        # long enough for the other threads to look for it meanwhile
+        time.sleep(0.05)
+        return Config()
+
+    container = injection.Container()
+    container.add_provider(Config, make_config)
+    with ThreadPoolExecutor(4) as executor:
+        configs = list(executor.map(lambda _: container.retrieve(Config), range(4)))
+
+    assert len(calls) == 1
+    assert all(config is configs[0] for config in configs)
+
+
+def test_provider_with_missing_dependency_raises_error():
+    injection.add_provider(Database, Database)
+    with pytest.raises(injection.MissingDependencyError):
+        injection.resolve_providers()
+
+
+def test_circular_providers_raise_error():
+    injection.add_provider(First, make_first)
+    injection.add_provider(Second, make_second)
+    with pytest.raises(injection.CircularDependencyError):
+        injection.resolve_providers()
+
+
+def test_provider_and_injectable_for_same_annotation_raises_error():
+    injection.add_injectable(Config, Config())
+    with pytest.raises(injection.DoubleInjectionError):
+        injection.add_provider(Config, Config)
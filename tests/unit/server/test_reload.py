@@ -0,0 +1,101 @@
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import pytest
+import uvicorn
+
+import relax.server
+from relax.config import BaseConfig
+from relax.server import ChangeClassifier, RelaxReload
+from tests.unit.conftest import Clock
+
+
+class FakeChannel:
+    def __init__(self, *, restart: bool = False) -> None:
+        self.updates: list[list[str]] = []
+        self.pending: dict[str, None] = {}
+        self.restart = restart
+
+    def update_views(self, changed_paths: Iterable[str]) -> bool:
+        self.updates.append(list(changed_paths))
+        return self.restart
+
+    def flush(self) -> bool:
+        return False
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(relax.server, "monotonic", clock)
+    return clock
+
+
+def make_reloader(changes: Iterable[set[str]]) -> tuple[RelaxReload, FakeChannel]:
+    cwd = Path.cwd()
+    reloader = RelaxReload(
+        uvicorn.Config(app="app:app", reload=True, reload_delay=0),
+        target=lambda _: None,
+        sockets=[],
+        base_config=BaseConfig(TEMPLATES_DIR=cwd / "templates", ENV="DEV"),
+        reload_debounce=0.1,
+    )
+    changed: Iterator[set[tuple[int, str]]] = (
+        {(1, str(cwd / path)) for path in paths} for paths in changes
+    )
+    reloader.watcher = changed  # type: ignore
+    channel = FakeChannel()
+    reloader.reload_channel = channel  # type: ignore
+    return reloader, channel
+
+
+def test_classifier_sorts_templates_app_files_and_ignored_ones():
+    root = Path("/project")
+    classify = ChangeClassifier(root / "templates", root=root)
+    assert classify(root / "templates/page.py") == "template"
+    assert classify(root / "main.py") == "app"
+    assert classify(root / "templates/.page.py.swp") == "ignored"
+    assert classify(root / "templates/__pycache__/page.cpython-311.pyc") == "ignored"
+    assert classify(root / ".git/hooks/pre-commit.py") == "ignored"
+    assert classify(root / "static/main.css") == "ignored"
+
+
+def test_classifier_globs_are_configurable():
+    root = Path("/project")
+    classify = ChangeClassifier(
+        root / "templates",
+        includes=["*.py", "*.html"],
+        excludes=["migrations"],
+        root=root,
+    )
+    assert classify(root / "templates/page.html") == "template"
+    assert classify(root / "migrations/0001.py") == "ignored"
+
+
+@pytest.mark.usefixtures(clock.__name__)
+def test_ignored_changes_do_nothing():
+    reloader, channel = make_reloader([{"templates/.page.py.swp", "notes.txt"}])
+    assert reloader.should_restart() is None
+    assert channel.updates == []
+
+
+def test_bursts_of_template_changes_are_sent_once(clock: Clock):
+    reloader, channel = make_reloader(
+        [{"templates/a.py"}, {"templates/b.py", "templates/a.py"}, set()],
+    )
+    assert reloader.should_restart() is None
+    clock.now = 0.05
+    assert reloader.should_restart() is None
+    assert channel.updates == []
+    clock.now = 0.2
+    assert reloader.should_restart() is None
+    (update,) = channel.updates
+    assert sorted(update) == ["templates/a.py", "templates/b.py"]
+
+
+def test_app_file_changes_restart_after_the_burst(clock: Clock):
+    reloader, channel = make_reloader([{"templates/a.py", "main.py"}, set()])
+    assert reloader.should_restart() is None
+    clock.now = 0.2
+    assert reloader.should_restart() == [Path.cwd() / "main.py"]
+    assert channel.updates == []
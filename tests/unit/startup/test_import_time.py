@@ -0,0 +1,71 @@
+import subprocess
+import sys
+
+import pytest
+
+# generous, cold imports on a loaded CI machine are a lot slower than locally
+IMPORT_BUDGET_US = {
+    "relax.html": 100_000,
+    "relax.injection": 150_000,
+    "relax.app": 600_000,
+}
+# template modules only import these two, and they are reloaded on every change
+LIGHT_MODULES = ("relax.html", "relax.injection")
+HEAVY_PACKAGES = ("pydantic", "starlette", "anyio", "asyncio")
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess[str]:
+    # only runs code from this module, with the running interpreter
+    return subprocess.run(  # noqa: S603
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_times(module: str) -> dict[str, int]:
+    # -X importtime writes "import time: self | cumulative | name" lines
+    stderr = run_python(f"import {module}", "-X", "importtime").stderr
+    times: dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", IMPORT_BUDGET_US)
+def test_import_time_budget(module: str):
+    assert import_times(module)[module] < IMPORT_BUDGET_US[module]
+
+
+@pytest.mark.parametrize("module", LIGHT_MODULES)
+def test_template_modules_do_not_import_heavy_packages(module: str):
+    imported = [
+        name for name in import_times(module) if name.split(".")[0] in HEAVY_PACKAGES
+    ]
+    assert imported == []
+
+
+def test_app_does_not_import_pydantic():
+    assert not any(name.startswith("pydantic") for name in import_times("relax.app"))
+
+
+def test_import_does_not_write_files():
+    code = """
+import sys
+
+writes = []
+
+def hook(event, args):
+    if event == "open" and isinstance(args[1], str) and set(args[1]) & set("wax+"):
+        writes.append(args[0])
+
+sys.addaudithook(hook)
+import relax.app
+import relax.injection
+print(writes)
+"""
+    assert run_python(code).stdout.strip() == "[]"